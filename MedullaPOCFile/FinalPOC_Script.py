@@ -1,18 +1,21 @@
 import os
-import time
-import base64
 import json
 from dotenv import load_dotenv
 from facebook_business.api import FacebookAdsApi
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.campaign import Campaign
-from facebook_business.adobjects.reachfrequencyprediction import ReachFrequencyPrediction
 from facebook_business.adobjects.adset import AdSet
 from facebook_business.adobjects.advideo import AdVideo
 from config import Config_Data
 import pandas as pd
 from date_time_stripper import Stripper
-import time
+from media_cache import MediaCache
+from media_upload import upload_image_file
+from prediction_poller import PredictionPoller, PredictionFailed
+from batch_transport import DependentBatch
+from geo_resolver import GEO_KINDS, GeoResolver, names_from_cell
+from geo_index import GeoIndex
+from throttle import default_throttle
 from datetime import datetime
 
 # Load credentials from .env
@@ -32,24 +35,36 @@ if page_id and page_id.startswith("pg_"):
 
 # Initialize the Facebook API
 FacebookAdsApi.init(app_id, app_secret, access_token)
+# Pace every SDK call from Meta's rate-limit headers instead of fixed sleeps
+default_throttle.install()
 account = AdAccount(ad_account_id)
 
+# One shared poller checks every outstanding prediction in a single Graph request per tick
+prediction_poller = PredictionPoller()
+
+# Image hashes / video IDs keyed by account + file SHA-256, shared across runs and with usingSavedAudience.py
+media_cache = MediaCache()
+
 ###################################################### HELPER METHODS ###############################################
 
-# Function to upload image and return hash
+# Function to upload image and return hash (cached by file contents, see media_cache.py)
 def get_image_hash(image_path):
+    return media_cache.get_or_upload(ad_account_id, "image", image_path, _upload_image)
+
+def _upload_image(image_path):
     print("🖼️  Uploading image and generating hash...")
     print("⏳ Please wait...")
-    with open(image_path, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode("utf-8")
-        image = account.create_ad_image(fields=[], params={"bytes": encoded})
-    image_hash = image.get("hash")
+    # Streamed from disk as multipart - no base64 copy of the whole file in memory
+    image_hash = upload_image_file(ad_account_id, image_path)
     print(f"✅ Image uploaded successfully. Hash: {image_hash}")
     return image_hash
 
 
-# Function to upload video and return video ID
+# Function to upload video and return video ID once encoded (cached by file contents, see media_cache.py)
 def get_video_id(video_path):
+    return media_cache.get_or_upload(ad_account_id, "video", video_path, _upload_video)
+
+def _upload_video(video_path):
     print("🎬 Uploading video and generating ID...")
     print("⏳ Please wait, this may take a few moments...")
     video = AdVideo(parent_id=ad_account_id)
@@ -62,8 +77,8 @@ def get_video_id(video_path):
     return vid_id
 
 
-# Function to create ad creative (image or video)
-def create_ad_creative(creative_type, media_path, ad_name, headline, description, message, link, call_to_action):
+# Creative parameters for an image or video ad; the creative is created in a batch with its ad
+def build_creative_params(creative_type, media_path, ad_name, headline, description, message, link, call_to_action):
     creative_params = {
         "name": ad_name,
         "object_story_spec": {
@@ -103,28 +118,18 @@ def create_ad_creative(creative_type, media_path, ad_name, headline, description
     else:
         raise ValueError("Invalid creative_type. Must be 'image' or 'video'.")
 
-    print("🎨 Creating ad creative...")
-    print("⏳ Please wait while we set up your creative...")
-    creative = account.create_ad_creative(fields=[], params=creative_params)
-    creative_id = creative.get("id")
-    print(f"✅ Creative Created Successfully: {creative_id}")
-    return creative_id
+    return creative_params
 
 
-# Function to create an ad in specified ad set
-def create_ad(adset_id, creative_id, ad_name, ad_status="ACTIVE"):
+# Ad parameters for an ad in the specified ad set; creative_id may be a result_ref() to a creative in the same batch
+def build_ad_params(adset_id, creative_id, ad_name, ad_status="ACTIVE"):
     ad_params = {
         "name": ad_name,
         "adset_id": adset_id,
         "creative": {"creative_id": creative_id},
         "status": ad_status.upper()
     }
-    print("📢 Creating ad...")
-    print("⏳ Please wait while we create your ad...")
-    ad = account.create_ad(fields=[], params=ad_params)
-    ad_id = ad.get("id")
-    print(f"✅ Ad Created Successfully: {ad_id}")
-    return ad_id
+    return ad_params
 
 ##FIltering campaign columns
 camp_cols = Config_Data.campaign_columns
@@ -142,6 +147,17 @@ final_df['prediction_id'] = ''
 final_df['ad_logs'] = ''
 final_df['ad_id'] = ''
 
+# Excluded states / cities go out as location keys: names are answered from the bundled geo index
+# (python geo_index.py --refresh) where it has them; any others are resolved (and cached) up front,
+# so no adset waits on a lookup and each name is searched once
+geo_resolver = GeoResolver(country="IN", index=GeoIndex.load("IN"))
+geo_resolver.resolve_many(
+    (location_type, name)
+    for column, (location_type, _) in GEO_KINDS.items() if column in df.columns
+    for cell in df[column].dropna().unique()
+    for name in names_from_cell(cell)
+)
+
 ####################################### COMPLETE CAMPAIGN FLOW #####################################
 camp_df = df[camp_cols].drop_duplicates()
 
@@ -285,22 +301,13 @@ for camp_idx, camp_row in camp_df.iterrows():
     if prediction_id:
         # Step 3: Poll for Prediction Status
         print("\n🔹 Checking Prediction Status...")
-        prediction_obj = ReachFrequencyPrediction(prediction_id)
-        status = None
-        for attempt in range(6):
-            prediction_obj = prediction_obj.api_get(fields=[ReachFrequencyPrediction.Field.status])
-            status = prediction_obj.get(ReachFrequencyPrediction.Field.status)
-            print(f"Attempt {attempt + 1}: Prediction Status = {status}")
-            
-            if status == 1:
-                print("✅ Prediction is SUCCESS and ready to reserve.")
-                break
-            elif status == 2:
-                time.sleep(10)
-                print("⏳ Prediction is still processing...")
-            else:
-                print(f"❌ Prediction Failed with status: {status}")
-                break
+        try:
+            prediction_poller.wait(prediction_id)
+            status = 1
+            print("✅ Prediction is SUCCESS and ready to reserve.")
+        except PredictionFailed as e:
+            status = e.status
+            print(f"❌ Prediction Failed with status: {status} ({e})")
 
         # Step 5: Reserve the Prediction only if status is 1 (success)
         if status == 1:
@@ -332,9 +339,9 @@ for camp_idx, camp_row in camp_df.iterrows():
             "countries": ["IN"],
             "location_types": ["home", "recent"],
             "excluded_geo_locations": {
-                "regions": [{"name": state.strip(), "country": "IN"} for state in eval(adset_row.get("exclude_states", "[]"))] if adset_row.get("exclude_states") and adset_row.get("exclude_states") != "[]" else [],
-                "cities": [{"name": city.strip(), "country": "IN"} for city in eval(adset_row.get("exclude_cities", "[]"))] if adset_row.get("exclude_cities") and adset_row.get("exclude_cities") != "[]" else []
-            }            
+                targeting_key: geo_resolver.places(location_type, names_from_cell(adset_row.get(column)))
+                for column, (location_type, targeting_key) in GEO_KINDS.items()
+            }
         }
         
         adset_params = {
@@ -371,6 +378,8 @@ for camp_idx, camp_row in camp_df.iterrows():
             print("No ads detected for this adset.")
             continue
             
+        # Creatives and ads of this adset are queued here and sent together below
+        ad_batch, queued_ads = DependentBatch(), []
         for ad_idx, ad_row in adset_ads.iterrows():
             # Check if the row is empty (all values are NaN)
             if ad_row.isnull().all():
@@ -396,17 +405,33 @@ for camp_idx, camp_row in camp_df.iterrows():
                 print("=" * 50)
                 
                 if creative_type.lower() == "image":
-                    print("📸 Creating image-based ad creative...")
-                    creative_id = create_ad_creative(creative_type, image_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+                    print("📸 Queueing image-based ad creative...")
+                    creative_params = build_creative_params(creative_type, image_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
                 else:
-                    print("🎬 Creating video-based ad creative...")
-                    creative_id = create_ad_creative(creative_type, video_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+                    print("🎬 Queueing video-based ad creative...")
+                    creative_params = build_creative_params(creative_type, video_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
 
-                # Step 5: Create Ad
-                print("\n📢 Finalizing ad creation...")
-                ad_id = create_ad(ad_row['adset_id'], creative_id, ad_name, ad_status="ACTIVE")
+                creative_ref = ad_batch.add(f"creative{ad_idx}", "POST", (ad_account_id, "adcreatives"), creative_params)
+                ad_batch.add(f"ad{ad_idx}", "POST", (ad_account_id, "ads"), build_ad_params(ad_row['adset_id'], creative_ref, ad_name, ad_status="ACTIVE"))
+                queued_ads.append((ad_idx, ad_name))
+                continue  # its result is written once the batch has been sent
+            except Exception as e:
+                ad_id = False
+                ad_logs = e
+                print(f"❌ Ad Creation Failed: {e}")
+
+            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_logs'] = ad_logs
+            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_id'] = ad_id
+
+        # Create the queued creatives and ads: one batch request per 50 calls instead of two requests per ad
+        if queued_ads:
+            print(f"\n📢 Creating {len(queued_ads)} ad(s) with their creatives in one batch request...")
+            created = ad_batch.execute()
+        for ad_idx, ad_name in queued_ads:
+            creative_id, ad_id = created[f"creative{ad_idx}"], created[f"ad{ad_idx}"]
+            if isinstance(creative_id, dict) and isinstance(ad_id, dict):
+                creative_id, ad_id = creative_id.get("id"), ad_id.get("id")
                 ad_logs = 'NO ERROR'
-                
                 print(f"\n🎉 Ad Creation Complete!")
                 print("=" * 50)
                 print(f"✅ Campaign ID: {campaign_id}")
@@ -416,14 +441,14 @@ for camp_idx, camp_row in camp_df.iterrows():
                 print(f"✅ Creative ID: {creative_id}")
                 print(f"✅ Ad ID: {ad_id}")
                 print("=" * 50)
-                
-            except Exception as e:
+            else:
+                # An ad whose creative failed was not sent; report the creative's error
+                ad_logs = creative_id if isinstance(creative_id, Exception) else ad_id
                 ad_id = False
-                ad_logs = e
-                print(f"❌ Ad Creation Failed: {e}")
+                print(f"❌ Ad Creation Failed for {ad_name}: {ad_logs}")
 
-            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_logs'] = ad_logs
-            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_id'] = ad_id
+            final_df.loc[final_df['ad_name'] == ad_name, 'ad_logs'] = ad_logs
+            final_df.loc[final_df['ad_name'] == ad_name, 'ad_id'] = ad_id
 
 
 
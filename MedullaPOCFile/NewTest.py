@@ -1,17 +1,20 @@
 import os
-import time
-import base64
 import json
 from dotenv import load_dotenv
 from facebook_business.api import FacebookAdsApi
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.campaign import Campaign
-from facebook_business.adobjects.reachfrequencyprediction import ReachFrequencyPrediction
 from facebook_business.adobjects.adset import AdSet
 from facebook_business.adobjects.advideo import AdVideo
 from config import Config_Data
 import pandas as pd
 from date_time_stripper import Stripper
+from media_cache import MediaCache
+from media_upload import upload_image_file
+from prediction_poller import PredictionPoller, PredictionFailed
+from batch_transport import DependentBatch
+from throttle import default_throttle
+from targeting_verify import TargetingVerifier
 from datetime import datetime
 
 # Load credentials from .env
@@ -31,8 +34,18 @@ if page_id and page_id.startswith("pg_"):
 
 # Initialize the Facebook API
 FacebookAdsApi.init(app_id, app_secret, access_token)
+# Pace every SDK call from Meta's rate-limit headers instead of fixed sleeps
+default_throttle.install()
 account = AdAccount(ad_account_id)
 
+# One shared poller checks every outstanding prediction in a single Graph request per tick
+prediction_poller = PredictionPoller()
+
+# Image hashes / video IDs keyed by account + file SHA-256, shared across runs and with usingSavedAudience.py
+media_cache = MediaCache()
+# Created adsets are verified together at the end instead of one api_get per adset
+targeting_verifier = TargetingVerifier()
+
 # UPDATED: Custom Audience ID for exclusions (replace with your actual custom audience ID)
 exclusion_custom_audience_id = "120230031807900477"  # Your saved audience converted to custom audience
 
@@ -74,19 +87,23 @@ def build_exclusions_from_saved_audience():
 
 ###################################################### HELPER METHODS ###############################################
 
-# Function to upload image and return hash
+# Function to upload image and return hash (cached by file contents, see media_cache.py)
 def get_image_hash(image_path):
+    return media_cache.get_or_upload(ad_account_id, "image", image_path, _upload_image)
+
+def _upload_image(image_path):
     print("🖼️  Uploading image and generating hash...")
     print("⏳ Please wait...")
-    with open(image_path, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode("utf-8")
-        image = account.create_ad_image(fields=[], params={"bytes": encoded})
-    image_hash = image.get("hash")
+    # Streamed from disk as multipart - no base64 copy of the whole file in memory
+    image_hash = upload_image_file(ad_account_id, image_path)
     print(f"✅ Image uploaded successfully. Hash: {image_hash}")
     return image_hash
 
-# Function to upload video and return video ID
+# Function to upload video and return video ID once encoded (cached by file contents, see media_cache.py)
 def get_video_id(video_path):
+    return media_cache.get_or_upload(ad_account_id, "video", video_path, _upload_video)
+
+def _upload_video(video_path):
     print("🎬 Uploading video and generating ID...")
     print("⏳ Please wait, this may take a few moments...")
     video = AdVideo(parent_id=ad_account_id)
@@ -98,8 +115,8 @@ def get_video_id(video_path):
     print(f"✅ Video uploaded successfully. ID: {vid_id}")
     return vid_id
 
-# Function to create ad creative (image or video)
-def create_ad_creative(creative_type, media_path, ad_name, headline, description, message, link, call_to_action):
+# Creative parameters for an image or video ad; the creative is created in a batch with its ad
+def build_creative_params(creative_type, media_path, ad_name, headline, description, message, link, call_to_action):
     creative_params = {
         "name": ad_name,
         "object_story_spec": {
@@ -139,27 +156,17 @@ def create_ad_creative(creative_type, media_path, ad_name, headline, description
     else:
         raise ValueError("Invalid creative_type. Must be 'image' or 'video'.")
 
-    print("🎨 Creating ad creative...")
-    print("⏳ Please wait while we set up your creative...")
-    creative = account.create_ad_creative(fields=[], params=creative_params)
-    creative_id = creative.get("id")
-    print(f"✅ Creative Created Successfully: {creative_id}")
-    return creative_id
+    return creative_params
 
-# Function to create an ad in specified ad set
-def create_ad(adset_id, creative_id, ad_name, ad_status="ACTIVE"):
+# Ad parameters for an ad in the specified ad set; creative_id may be a result_ref() to a creative in the same batch
+def build_ad_params(adset_id, creative_id, ad_name, ad_status="ACTIVE"):
     ad_params = {
         "name": ad_name,
         "adset_id": adset_id,
         "creative": {"creative_id": creative_id},
         "status": ad_status.upper()
     }
-    print("📢 Creating ad...")
-    print("⏳ Please wait while we create your ad...")
-    ad = account.create_ad(fields=[], params=ad_params)
-    ad_id = ad.get("id")
-    print(f"✅ Ad Created Successfully: {ad_id}")
-    return ad_id
+    return ad_params
 
 # Filtering campaign columns
 camp_cols = Config_Data.campaign_columns
@@ -342,22 +349,13 @@ for camp_idx, camp_row in camp_df.iterrows():
 
         # Step 3: Poll for Prediction Status
         print("\n🔹 Checking Prediction Status...")
-        prediction_obj = ReachFrequencyPrediction(prediction_id)
-        status = None
-        for attempt in range(6):
-            prediction_obj = prediction_obj.api_get(fields=[ReachFrequencyPrediction.Field.status])
-            status = prediction_obj.get(ReachFrequencyPrediction.Field.status)
-            print(f"Attempt {attempt + 1}: Prediction Status = {status}")
-            
-            if status == 1:
-                print("✅ Prediction is SUCCESS and ready to reserve.")
-                break
-            elif status == 2:
-                time.sleep(10)
-                print("⏳ Prediction is still processing...")
-            else:
-                print(f"❌ Prediction Failed with status: {status}")
-                break
+        try:
+            prediction_poller.wait(prediction_id)
+            status = 1
+            print("✅ Prediction is SUCCESS and ready to reserve.")
+        except PredictionFailed as e:
+            status = e.status
+            print(f"❌ Prediction Failed with status: {status} ({e})")
 
         # Step 5: Reserve the Prediction if successful
         if status == 1:
@@ -410,44 +408,9 @@ for camp_idx, camp_row in camp_df.iterrows():
         
         print(f"✅ Ad Set ID {adset_id} assigned to adset {adset_row['adset_name']}")
 
-        # CONFIRMATION STEP: Fetch ad set details from Meta API to verify exclusions were applied
-        print(f"\n🔍 CONFIRMATION: Fetching ad set details from Meta API to verify exclusions...")
-        try:
-            # Fetch the created ad set with targeting details
-            adset_obj = AdSet(adset_id)
-            adset_details = adset_obj.api_get(fields=[
-                'id', 'name', 'targeting', 'status'
-            ])
-            
-            print(f"📋 Ad Set Details Retrieved:")
-            print(f"   ID: {adset_details.get('id')}")
-            print(f"   Name: {adset_details.get('name')}")
-            print(f"   Status: {adset_details.get('status')}")
-            
-            # Check targeting structure
-            targeting = adset_details.get('targeting', {})
-            if targeting:
-                print(f"   📍 Geo Locations: {targeting.get('geo_locations', 'Not set')}")
-                
-                # Check excluded custom audiences
-                if targeting.get('excluded_custom_audiences'):
-                    excluded_ca = targeting['excluded_custom_audiences']
-                    print(f"   🚫 Excluded Custom Audiences: {excluded_ca}")
-                else:
-                    print(f"   🚫 Excluded Custom Audiences: None found")
-                
-                # Check excluded geo locations
-                if targeting.get('geo_locations', {}).get('excluded_geo_locations'):
-                    excluded_geo_actual = targeting['geo_locations']['excluded_geo_locations']
-                    print(f"   🚫 Excluded Geo Locations: {excluded_geo_actual}")
-                else:
-                    print(f"   🚫 Excluded Geo Locations: None found")
-                    
-            else:
-                print(f"   📍 Targeting: Not set or empty")
-                
-        except Exception as e:
-            print(f"⚠️ Could not fetch ad set details for confirmation: {e}")
+        # Targeting is read back for every adset at once at the end of the run
+        if adset_id:
+            targeting_verifier.expect(adset_id, target_spec, key=(adset_row['campaign_id'], adset_row['adset_name']))
 
         # Step 6: Process all ads for this adset
         ad_columns = Config_Data.ad_columns
@@ -457,6 +420,8 @@ for camp_idx, camp_row in camp_df.iterrows():
             print("No ads detected for this adset.")
             continue
         
+        # Creatives and ads of this adset are queued here and sent together below
+        ad_batch, queued_ads = DependentBatch(), []
         for ad_idx, ad_row in adset_ads.iterrows():
             if ad_row.isnull().all():
                 print("No further ads detected for this adset.")
@@ -487,17 +452,33 @@ for camp_idx, camp_row in camp_df.iterrows():
                 print("=" * 50)
                 
                 if creative_type.lower() == "image":
-                    print("📸 Creating image-based ad creative...")
-                    creative_id = create_ad_creative(creative_type, image_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+                    print("📸 Queueing image-based ad creative...")
+                    creative_params = build_creative_params(creative_type, image_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
                 else:
-                    print("🎬 Creating video-based ad creative...")
-                    creative_id = create_ad_creative(creative_type, video_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+                    print("🎬 Queueing video-based ad creative...")
+                    creative_params = build_creative_params(creative_type, video_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+
+                creative_ref = ad_batch.add(f"creative{ad_idx}", "POST", (ad_account_id, "adcreatives"), creative_params)
+                ad_batch.add(f"ad{ad_idx}", "POST", (ad_account_id, "ads"), build_ad_params(ad_row['adset_id'], creative_ref, ad_name, ad_status="ACTIVE"))
+                queued_ads.append((ad_idx, ad_name))
+                continue  # its result is written once the batch has been sent
+            except Exception as e:
+                ad_id = False
+                ad_logs = e
+                print(f"❌ Ad Creation Failed: {e}")
+
+            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_logs'] = ad_logs
+            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_id'] = ad_id
 
-                # Create Ad
-                print("\n📢 Finalizing ad creation...")
-                ad_id = create_ad(ad_row['adset_id'], creative_id, ad_name, ad_status="ACTIVE")
+        # Create the queued creatives and ads: one batch request per 50 calls instead of two requests per ad
+        if queued_ads:
+            print(f"\n📢 Creating {len(queued_ads)} ad(s) with their creatives in one batch request...")
+            created = ad_batch.execute()
+        for ad_idx, ad_name in queued_ads:
+            creative_id, ad_id = created[f"creative{ad_idx}"], created[f"ad{ad_idx}"]
+            if isinstance(creative_id, dict) and isinstance(ad_id, dict):
+                creative_id, ad_id = creative_id.get("id"), ad_id.get("id")
                 ad_logs = 'NO ERROR'
-                
                 print(f"\n🎉 Ad Creation Complete!")
                 print("=" * 50)
                 print(f"✅ Campaign ID: {campaign_id}")
@@ -507,14 +488,19 @@ for camp_idx, camp_row in camp_df.iterrows():
                 print(f"✅ Creative ID: {creative_id}")
                 print(f"✅ Ad ID: {ad_id}")
                 print("=" * 50)
-                
-            except Exception as e:
+            else:
+                # An ad whose creative failed was not sent; report the creative's error
+                ad_logs = creative_id if isinstance(creative_id, Exception) else ad_id
                 ad_id = False
-                ad_logs = e
-                print(f"❌ Ad Creation Failed: {e}")
+                print(f"❌ Ad Creation Failed for {ad_name}: {ad_logs}")
 
-            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_logs'] = ad_logs
-            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_id'] = ad_id
+            final_df.loc[final_df['ad_name'] == ad_name, 'ad_logs'] = ad_logs
+            final_df.loc[final_df['ad_name'] == ad_name, 'ad_id'] = ad_id
+
+# Check every created adset's targeting against what was sent, one multi-ID request per 50 adsets;
+# the verdicts are keyed by (campaign_id, adset_name) and written back in a single pass over final_df
+verdicts = targeting_verifier.verify()
+final_df['verification'] = [verdicts.get(key, '') for key in zip(final_df['campaign_id'], final_df['adset_name'])]
 
 # Save results to CSV
 final_df.to_csv('finaloutput.csv', index=False)
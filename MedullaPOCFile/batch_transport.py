@@ -0,0 +1,234 @@
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+from facebook_business.api import FacebookAdsApi
+
+# Graph accepts at most 50 calls per batch request
+MAX_BATCH_SIZE = 50
+
+# JSONPath reference to the ID returned by an earlier, named call of the same batch
+RESULT_REF = re.compile(r"\{result=([^:}]+):\$\.id\}")
+
+
+def result_ref(name):
+    return f"{{result={name}:$.id}}"
+
+
+def check_path(path):
+    """Raise ValueError unless path is a tuple / list of non-empty IDs and edge names."""
+    if isinstance(path, str) or not isinstance(path, (tuple, list)) or not path:
+        raise ValueError(f"Graph path must be a tuple of path segments, got {path!r}")
+    for part in path:
+        if not isinstance(part, (str, int)) or isinstance(part, bool) or str(part) == "":
+            raise ValueError(f"Invalid Graph path segment {part!r} in {path!r}")
+    return tuple(path)
+
+
+class BatchCallFailed(Exception):
+    """A batched call that got no response from Meta, even after retrying the batch."""
+
+
+class BatchTransport:
+    """
+    Queues independent Graph calls and sends them as batch requests of up to 50 calls.
+
+    submit() returns a Future for one call; it resolves with that call's JSON body, or fails
+    with the FacebookRequestError Meta returned for that call alone, so every sub-response
+    lands back on the plan row that asked for it. A batch goes out once it holds
+    `max_size` calls or its oldest call has waited `linger` seconds, whichever comes first;
+    calls Meta left unanswered are sent again in a new batch up to `retries` times.
+
+    Any number of threads can submit at once; that is how several ads' creates end up in
+    the same request.
+    """
+
+    def __init__(self, api=None, max_size=MAX_BATCH_SIZE, linger=0.2, retries=3):
+        self.api = api
+        self.max_size = max_size
+        self.linger = linger
+        self.retries = retries
+        self._pending = []  # (call, future, label, queued_at)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="graph-batch", daemon=True)
+        self._thread.start()
+
+    def submit(self, method, path, params=None, label=None):
+        """Queue one call, e.g. submit("POST", (account_id, "campaigns"), params); returns a Future."""
+        path = check_path(path)
+        future = Future()
+        call = {"method": method, "path": path, "params": params or {}}
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BatchTransport is closed")
+            self._pending.append((call, future, label or "/".join(map(str, path)), time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def call(self, method, path, params=None, label=None):
+        """submit() and wait for the result."""
+        return self.submit(method, path, params, label).result()
+
+    def flush(self):
+        """Send everything queued so far right away, from the calling thread."""
+        with self._cond:
+            items, self._pending = self._pending, []
+        for i in range(0, len(items), self.max_size):
+            self.send(items[i:i + self.max_size])
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Give other threads up to `linger` seconds to fill the batch
+                deadline = self._pending[0][3] + self.linger
+                while len(self._pending) < self.max_size and not self._closed and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                items, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+            try:
+                self.send(items)
+            except Exception as e:
+                # Keep the sender thread alive; the calls of this batch get the error instead of hanging
+                print(f"❌ Batch request could not be sent: {e}")
+                for _, future, _, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def send(self, items):
+        """Send up to max_size queued (call, future, label, queued_at) items as one batch request."""
+        if not items:
+            return
+        api = self.api or FacebookAdsApi.get_default_api()
+        print(f"📦 Sending {len(items)} call(s) in one batch request")
+        batch = api.new_batch()
+        added = 0
+        for call, future, label, _ in items:
+            try:
+                batch.add(
+                    call["method"], call["path"], params=call["params"],
+                    success=lambda response, f=future: f.set_result(response.json()),
+                    failure=lambda response, f=future: f.set_exception(response.error()),
+                )
+                added += 1
+            except Exception as e:
+                # A call that cannot be encoded fails on its own; the rest of the batch still goes out
+                future.set_exception(e)
+        if not added:
+            return
+
+        try:
+            for attempt in range(self.retries + 1):
+                batch = batch.execute()
+                if batch is None:
+                    break
+                if attempt < self.retries:
+                    print(f"⚠️ {len(batch)} batched call(s) got no response, retrying ({attempt + 1}/{self.retries})")
+                    time.sleep(2 ** attempt)
+        except Exception as e:
+            # The batch request itself failed (network, auth): every call in it failed
+            for _, future, _, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for _, future, label, _ in items:
+            if not future.done():
+                future.set_exception(BatchCallFailed(f"No response from Meta for {label}"))
+
+
+class DependentBatch:
+    """
+    A tree of creates that point at each other's IDs with result_ref(name), e.g. an ad set
+    whose campaign_id is "{result=campaign:$.id}", sent as one batch request per 50 calls.
+
+    Calls go out in the order they were added, so parents must be added before their
+    children. References inside the same request are resolved by Meta; references to calls
+    sent in an earlier request (a tree of more than 50 calls) are replaced with the real ID
+    before sending, and calls whose parent failed are not sent at all. resolve() registers
+    an ID that already exists, e.g. a campaign created by an earlier run.
+
+    execute() returns {name: JSON body of the call, or the exception it failed with}.
+    """
+
+    def __init__(self, api=None, max_size=MAX_BATCH_SIZE):
+        self.api = api
+        self.max_size = max_size
+        self.results = {}
+        self._calls = []
+
+    def __len__(self):
+        return len(self._calls)
+
+    def add(self, name, method, path, params):
+        self._calls.append((name, method, check_path(path), params))
+        return result_ref(name)
+
+    def resolve(self, name, object_id):
+        self.results[name] = {"id": object_id}
+        return object_id
+
+    def execute(self):
+        api = self.api or FacebookAdsApi.get_default_api()
+        calls, self._calls = self._calls, []
+        for i in range(0, len(calls), self.max_size):
+            batch = api.new_batch()
+            sent = []
+            for name, method, path, params in calls[i:i + self.max_size]:
+                failed = [ref for ref in self._refs(params) if isinstance(self.results.get(ref), Exception)]
+                if failed:
+                    self.results[name] = BatchCallFailed(f"Not sent: {', '.join(failed)} failed")
+                    continue
+                added = batch.add(
+                    method, path, params=self._substitute(params),
+                    success=lambda response, n=name: self.results.__setitem__(n, response.json()),
+                    failure=lambda response, n=name: self.results.__setitem__(n, response.error()),
+                )
+                added["name"] = name
+                # Meta drops the body of a call another call depends on unless told to keep it
+                added["omit_response_on_success"] = False
+                sent.append(name)
+
+            if sent:
+                print(f"📦 Sending {len(sent)} dependent call(s) in one batch request")
+                try:
+                    batch.execute()
+                except Exception as e:
+                    for name in sent:
+                        self.results[name] = e
+            for name in sent:
+                # Meta returns no response for a call whose dependency failed within the batch
+                self.results.setdefault(name, BatchCallFailed(f"No response from Meta for {name}"))
+        return self.results
+
+    def _refs(self, value):
+        if isinstance(value, str):
+            return RESULT_REF.findall(value)
+        if isinstance(value, dict):
+            return [ref for v in value.values() for ref in self._refs(v)]
+        if isinstance(value, (list, tuple)):
+            return [ref for v in value for ref in self._refs(v)]
+        return []
+
+    def _substitute(self, value):
+        if isinstance(value, str):
+            def _known(match):
+                result = self.results.get(match.group(1))
+                return str(result["id"]) if isinstance(result, dict) and "id" in result else match.group(0)
+            return RESULT_REF.sub(_known, value)
+        if isinstance(value, dict):
+            return {k: self._substitute(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._substitute(v) for v in value]
+        return value
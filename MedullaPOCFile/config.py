@@ -24,6 +24,16 @@ class Config_Data:
 
    locales = {'English (UK)':24 , "Hindi": 46, "Marathi": 81}
 
+   # --sweep: R&F prediction variants tried for every adset (budget_multiplier scales adset_budget_amount).
+   # The best finished variant by rf_sweep_objective ('cost_per_reach', 'reach', 'impressions' or
+   # 'reach_at_frequency', which counts people reached at least rf_sweep_min_frequency times) is reserved.
+   rf_sweep_grid = {'budget_multiplier': [0.8, 1.0, 1.2], 'frequency_cap': [1, 2, 3], 'interval_frequency_cap_reset_period': [96]}
+   rf_sweep_objective = 'cost_per_reach'
+   rf_sweep_min_frequency = 2
+
+   # --preflight: R&F adsets whose estimated audience (upper bound) is below this are rejected before any prediction
+   rf_min_audience_size = 200000
+
 
    update_camp_cols = ["account_id",	"campaign_id"	,"campaign_name"	,'adset_id','adset_name','bid_strategy','bid_amount',"campaign_status"	,"campaign_budget_type"	,"campaign_budget_amount", "campaign_logs", "campaign_spend_cap"]
    update_adset_cols = ["account_id", "campaign_id","campaign_name","adset_id", "adset_name","adset_lifetime_spend_cap","adset_daily_spend_cap", "adset_status","adset_budget_type", "adset_budget_amount", "start_date", "end_date", "bid_strategy", "bid_amount",'custom_audience_id', 'custom_audience_name',	'custom_audience_description', 'custom_audience_retention_days', 'custom_audience_video_ids', 'custom_audience_content_type', 'lookalike_audience_id','lookalike_audience_name', 'lookalike_audience_description','lookalike_audience_ratio', "country", "state", "exclude_states", "city", 'pincode', "latitude","longitude", "radius_(km)", "age_min", "age_max", "gender","Advantage Detailed Targeting","Languages","interests","placement_type","publisher_platforms","facebook_positions","instagram_positions","device","campaign_logs","adset_logs"]
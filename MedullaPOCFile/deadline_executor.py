@@ -0,0 +1,65 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import Future
+
+
+class DeadlineExecutor:
+    """
+    Thread pool that starts queued tasks earliest-deadline-first instead of in submission order.
+
+    submit(fn, *args, deadline=epoch_seconds) returns a Future like ThreadPoolExecutor.submit().
+    Tasks without a deadline run after every task that has one, in the order they were
+    submitted. A task that only gets a thread after its deadline still runs, with a warning.
+    shutdown() lets the queue drain before the workers exit.
+    """
+
+    def __init__(self, max_workers, name="deadline-worker"):
+        self._queue = []  # (deadline, seq, future, fn, args, kwargs)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(max(1, max_workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, deadline=None, **kwargs):
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new tasks after shutdown")
+            heapq.heappush(self._queue, (deadline or math.inf, next(self._seq), future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._shutdown:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline, _, future, fn, args, kwargs = heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            late = time.time() - deadline
+            if late > 0:
+                print(f"⏰ {getattr(fn, '__name__', 'task')} started {late:.0f}s after its deadline")
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
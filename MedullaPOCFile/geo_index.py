@@ -0,0 +1,212 @@
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from facebook_business.api import FacebookAdsApi
+
+from geo_resolver import _normalize
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+# Most results adgeolocation search returns for one query; a full page means the prefix needs narrowing
+SEARCH_LIMIT = 1000
+
+
+def _name_key(name):
+    # "Dehra Dun" and "Dehradun" are the same place
+    return _normalize(name).replace(" ", "")
+
+
+def index_path(country):
+    """Where --refresh saves the snapshot, next to the scripts, e.g. geo_index_IN.json.gz."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f"geo_index_{country}.json.gz")
+
+
+class GeoIndex:
+    """
+    Offline snapshot of Meta's adgeolocation regions and cities for one country.
+
+    build() crawls /search?type=adgeolocation by name prefix (regions country-wide, cities region by
+    region) and save() writes a compact gzipped JSON file; load() reads it back and lookup() answers
+    name -> location from memory, so runs using it make no geo calls. Names are matched ignoring
+    case, spaces and hyphens; where two cities share a name the one Meta ranked first wins.
+    """
+
+    def __init__(self, country, regions, cities, built_at=None):
+        self.country = country
+        self.regions = regions  # [{"key", "name"}]
+        self.cities = cities  # [{"key", "name", "region_id"}]
+        self.built_at = built_at
+        self.failed_pages = []  # search pages build() had to skip
+        self._by_name = {}
+        for location_type, entries in (("region", regions), ("city", cities)):
+            for entry in entries:
+                self._by_name.setdefault(
+                    (location_type, _name_key(entry["name"])), {**entry, "type": location_type, "country_code": country},
+                )
+
+    def __len__(self):
+        return len(self.regions) + len(self.cities)
+
+    def lookup(self, location_type, name):
+        """The location for a region / city name, or None when the snapshot does not have it."""
+        return self._by_name.get((location_type, _name_key(name)))
+
+    @classmethod
+    def load(cls, country="IN", path=None):
+        """The saved snapshot for a country, or None if there is none (or it is unreadable)."""
+        path = path or index_path(country)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable geo index {path}: {e}")
+            return None
+        return cls(
+            data["country"],
+            [{"key": key, "name": name} for key, name in data["regions"]],
+            [{"key": key, "name": name, "region_id": region_id} for key, name, region_id in data["cities"]],
+            data.get("built_at"),
+        )
+
+    def save(self, path=None):
+        path = path or index_path(self.country)
+        data = {
+            "country": self.country,
+            "built_at": self.built_at,
+            "regions": [[r["key"], r["name"]] for r in self.regions],
+            "cities": [[c["key"], c["name"], c.get("region_id")] for c in self.cities],
+        }
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def build(cls, country="IN", api=None, parallel=8, previous=None):
+        """
+        Crawl every region and city of a country from Meta (a few thousand searches for India).
+
+        A search page that still fails after retrying is skipped. When any page was skipped, the
+        locations of `previous` (the index being refreshed) that the crawl did not find again are
+        kept, so a partial crawl never loses keys the old snapshot had.
+        """
+        api = api or FacebookAdsApi.get_default_api()
+        failed = []
+
+        print(f"🗺️ Crawling regions for {country}...")
+        regions = {}
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            for found in executor.map(lambda letter: _crawl(api, country, "region", letter, failed=failed), ALPHABET):
+                for r in found:
+                    regions.setdefault(str(r["key"]), {"key": str(r["key"]), "name": r["name"]})
+        print(f"✅ {len(regions)} region(s)")
+
+        print(f"🗺️ Crawling cities in {len(regions)} region(s)...")
+        jobs = [(region_key, letter) for region_key in regions for letter in ALPHABET]
+        cities = {}
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            for (region_key, _), found in zip(jobs, executor.map(
+                lambda job: _crawl(api, country, "city", job[1], region_id=job[0], failed=failed), jobs,
+            )):
+                for c in found:
+                    cities.setdefault(str(c["key"]), {
+                        "key": str(c["key"]), "name": c["name"], "region_id": str(c.get("region_id") or region_key),
+                    })
+        print(f"✅ {len(cities)} cities")
+
+        if failed:
+            print(f"⚠️ {len(failed)} search page(s) failed after retrying: {', '.join(failed[:5])}{' ...' if len(failed) > 5 else ''}")
+            if previous is not None:
+                kept = 0
+                for entry in previous.regions:
+                    kept += regions.setdefault(entry["key"], entry) is entry
+                for entry in previous.cities:
+                    kept += cities.setdefault(entry["key"], entry) is entry
+                print(f"↩️ Kept {kept} location(s) from the previous index that the crawl did not reach")
+        index = cls(country, list(regions.values()), list(cities.values()), built_at=int(time.time()))
+        index.failed_pages = failed
+        return index
+
+
+def _search(api, params, retries=3):
+    for attempt in range(retries + 1):
+        try:
+            return api.call("GET", ("search",), params=params).json().get("data", [])
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"⚠️ Search for {params['q']!r} failed, retrying ({attempt + 1}/{retries}): {e}")
+            time.sleep(2 ** attempt)
+
+
+def _crawl(api, country, location_type, prefix, region_id=None, failed=None):
+    """Every location of a type whose name matches a prefix, narrowing the prefix whenever a page fills up."""
+    params = {
+        "type": "adgeolocation",
+        "location_types": json.dumps([location_type]),
+        "q": prefix,
+        "country_code": country,
+        "limit": SEARCH_LIMIT,
+    }
+    if region_id:
+        params["region_id"] = region_id
+    try:
+        results = _search(api, params)
+    except Exception as e:
+        print(f"❌ Skipping {location_type} search {prefix!r}{f' in region {region_id}' if region_id else ''}: {e}")
+        if failed is not None:
+            failed.append(f"{location_type}:{region_id or country}:{prefix}")
+        return []
+    found = [
+        r for r in results
+        if r.get("type", location_type) == location_type and r.get("country_code", country) == country
+    ]
+    if len(found) >= SEARCH_LIMIT and len(prefix) < 4:
+        for letter in ALPHABET + " ":
+            found.extend(_crawl(api, country, location_type, prefix + letter, region_id, failed))
+    return found
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import load_dotenv
+
+    from throttle import default_throttle
+
+    parser = argparse.ArgumentParser(description="Build or query the offline region/city key index")
+    parser.add_argument("--country", default="IN")
+    parser.add_argument("--refresh", action="store_true", help="Re-crawl Meta's regions and cities and rewrite the index")
+    parser.add_argument("--parallel", type=int, default=8)
+    parser.add_argument("names", nargs="*", help="Region / city names to look up")
+    args = parser.parse_args()
+
+    if args.refresh:
+        load_dotenv()
+        FacebookAdsApi.init(os.getenv("FB_APP_ID"), os.getenv("FB_APP_SECRET"), os.getenv("FB_ACCESS_TOKEN"))
+        default_throttle.install()
+        previous = GeoIndex.load(args.country)
+        index = GeoIndex.build(args.country, parallel=args.parallel, previous=previous)
+        if not index.regions:
+            # Nothing usable came back (e.g. bad token): leave the existing snapshot alone
+            raise SystemExit(f"❌ The crawl found no regions; {index_path(args.country)} was not changed")
+        print(f"💾 Saved {len(index)} location(s) to {index.save()}")
+    else:
+        index = GeoIndex.load(args.country)
+        if index is None:
+            raise SystemExit(f"❌ No geo index for {args.country} at {index_path(args.country)}; build one with --refresh")
+        built = time.strftime("%Y-%m-%d", time.localtime(index.built_at)) if index.built_at else "unknown"
+        print(f"📚 {len(index.regions)} region(s), {len(index.cities)} cities for {args.country} (built {built})")
+
+    for name in args.names:
+        region, city = index.lookup("region", name), index.lookup("city", name)
+        if not (region or city):
+            print(f"❌ {name}: not in the index")
+        for location in filter(None, (region, city)):
+            print(f"{name}: {location['type']} {location['name']} — key {location['key']}")
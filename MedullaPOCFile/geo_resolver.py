@@ -0,0 +1,133 @@
+import ast
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from facebook_business.api import FacebookAdsApi
+
+from graph_io import CACHE_DIR, load_json, save_json
+
+# Sheet column -> adgeolocation location type / targeting key
+GEO_KINDS = {"exclude_states": ("region", "regions"), "exclude_cities": ("city", "cities")}
+
+
+def _normalize(name):
+    return " ".join(str(name).lower().replace("-", " ").split())
+
+
+def names_from_cell(value):
+    """Place names from a sheet cell such as "['Bihar', 'Rajasthan']" (or a plain comma-separated list)."""
+    if value is None or (isinstance(value, float) and value != value) or str(value).strip() in ("", "[]"):
+        return []
+    if isinstance(value, (list, tuple)):
+        names = value
+    else:
+        try:
+            names = ast.literal_eval(str(value))
+        except (ValueError, SyntaxError):
+            names = str(value).split(",")
+        if isinstance(names, str):
+            names = [names]
+    return [str(name).strip() for name in names if str(name).strip()]
+
+
+class GeoResolver:
+    """
+    Resolves region / city names to the location keys targeting needs, cached on disk.
+
+    resolve_many() looks up every distinct (location type, name) it is given that the cache does
+    not already hold, concurrently (`parallel` at a time) through /search?type=adgeolocation.
+    Found keys are kept for `ttl` seconds; names Meta has no match for are remembered too
+    (for `negative_ttl`), so a typo in the sheet costs one search a day rather than one per run.
+    Failed requests are not cached.
+
+    With an `index` (a GeoIndex snapshot) names it knows are answered from it and never searched.
+    """
+
+    def __init__(self, country="IN", path=os.path.join(CACHE_DIR, "geo_keys.json"), ttl=30 * 24 * 3600,
+                 negative_ttl=24 * 3600, parallel=8, api=None, index=None):
+        self.country = country
+        self.index = index
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.parallel = parallel
+        self.api = api
+        self._lock = threading.Lock()
+        self._entries = load_json(path, {}, "geo key cache")
+
+    def cache_key(self, location_type, name):
+        return f"{self.country}:{location_type}:{_normalize(name)}"
+
+    def lookup(self, location_type, name):
+        """The cached location ({"key", "name", ...}) for a name, None when Meta has no match; KeyError if unresolved."""
+        location = self.index.lookup(location_type, name) if self.index else None
+        if location:
+            return location
+        entry = self._entries.get(self.cache_key(location_type, name))
+        if not entry or time.time() - entry["at"] >= (self.ttl if entry["location"] else self.negative_ttl):
+            raise KeyError(name)
+        return entry["location"]
+
+    def resolve_many(self, places):
+        """Resolve every (location type, name) pair not cached yet; returns how many were searched."""
+        missing = {}
+        for location_type, name in places:
+            try:
+                self.lookup(location_type, name)
+            except KeyError:
+                missing.setdefault(self.cache_key(location_type, name), (location_type, name))
+        if not missing:
+            return 0
+
+        print(f"🗺️ Resolving {len(missing)} location name(s) to targeting keys...")
+        with ThreadPoolExecutor(max_workers=max(1, self.parallel)) as executor:
+            found = dict(zip(missing, executor.map(lambda place: self._search(*place), missing.values())))
+
+        now = int(time.time())
+        with self._lock:
+            for key, result in found.items():
+                if isinstance(result, Exception):
+                    print(f"⚠️ Could not resolve {missing[key][0]} '{missing[key][1]}': {result}")
+                    continue
+                if result is None:
+                    print(f"⚠️ No {missing[key][0]} named '{missing[key][1]}' in {self.country}")
+                self._entries[key] = {"location": result, "at": now}
+            self._save()
+        return len(missing)
+
+    def places(self, location_type, names):
+        """Targeting entries for names: {"key": ...} where resolved, otherwise the name as before."""
+        entries = []
+        for name in names:
+            try:
+                location = self.lookup(location_type, name)
+            except KeyError:
+                location = None
+            entries.append({"key": location["key"]} if location else {"name": name, "country": self.country})
+        return entries
+
+    def _search(self, location_type, name):
+        api = self.api or FacebookAdsApi.get_default_api()
+        try:
+            results = api.call("GET", ("search",), params={
+                "type": "adgeolocation",
+                "location_types": json.dumps([location_type]),
+                "q": name,
+                "country_code": self.country,
+                "limit": 10,
+            }).json().get("data", [])
+        except Exception as e:
+            return e
+        results = [r for r in results if r.get("type", location_type) == location_type
+                   and r.get("country_code", self.country) == self.country]
+        if not results:
+            return None
+        # Prefer an exact name match over Meta's first (most relevant) result
+        best = next((r for r in results if _normalize(r.get("name", "")) == _normalize(name)), results[0])
+        return {k: best[k] for k in ("key", "name", "type", "country_code", "region", "region_id") if k in best}
+
+    def _save(self):
+        save_json(self.path, self._entries)
@@ -0,0 +1,58 @@
+import json
+import os
+
+from facebook_business.api import FacebookAdsApi
+
+# Local caches (media, predictions, reach curves, ...) all live here
+CACHE_DIR = ".meta_cache"
+
+# Graph accepts at most 50 IDs in one ?ids= request
+MAX_IDS_PER_REQUEST = 50
+
+
+def load_json(path, default, label):
+    """The JSON saved at path, or `default` if there is no file or it cannot be read."""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable {label} {path}: {e}")
+        return default
+
+
+def save_json(path, data, **dump_args):
+    """Write data to path through a temp file, so a crash mid-write never leaves half a file behind."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **dump_args)
+    os.replace(tmp_path, path)
+
+
+def get_by_ids(object_ids, fields, api=None):
+    """
+    Fetch objects with one multi-ID GET (?ids=a,b,c&fields=...) per 50 and return (records, errors).
+
+    One deleted or unknown ID fails a whole multi-ID request, so the objects of a chunk that fails
+    are fetched again one by one. records maps ID -> JSON body; errors maps the ID of every object
+    whose own GET failed to its exception. An ID in neither was not returned by Graph.
+    """
+    api = api or FacebookAdsApi.get_default_api()
+    object_ids = [str(i) for i in object_ids]
+    fields = ','.join(fields)
+    records, errors = {}, {}
+    for i in range(0, len(object_ids), MAX_IDS_PER_REQUEST):
+        chunk = object_ids[i:i + MAX_IDS_PER_REQUEST]
+        try:
+            found = api.call('GET', (), params={'ids': ','.join(chunk), 'fields': fields}).json()
+        except Exception:
+            for object_id in chunk:
+                try:
+                    records[object_id] = api.call('GET', (object_id,), params={'fields': fields}).json()
+                except Exception as e:
+                    errors[object_id] = e
+        else:
+            records.update((object_id, found[object_id]) for object_id in chunk if found.get(object_id) is not None)
+    return records, errors
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import threading
+import time
+
+from graph_io import CACHE_DIR, get_by_ids, load_json, save_json
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of the file contents, read in chunks so large videos never sit in memory."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCache:
+    """
+    Persistent map of (ad account, media kind, SHA-256 of file contents) -> image hash / video ID.
+
+    Uploading the same file twice, in one run or across runs, becomes a local lookup.
+    Entries Meta no longer recognises (deleted images, removed videos) are dropped with
+    invalidate() or verify().
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "media_cache.json")):
+        self.path = path
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._digests = {}  # (path, size, mtime) -> sha256, avoids re-hashing the same file every ad
+        self._entries = load_json(path, {}, "media cache")
+
+    def digest(self, file_path):
+        stat = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+        if memo_key not in self._digests:
+            self._digests[memo_key] = file_digest(file_path)
+        return self._digests[memo_key]
+
+    def key(self, account_id, kind, file_path):
+        return f"{account_id}:{kind}:{self.digest(file_path)}"
+
+    def get(self, account_id, kind, file_path):
+        entry = self._entries.get(self.key(account_id, kind, file_path))
+        return entry["value"] if entry else None
+
+    def put(self, account_id, kind, file_path, value):
+        with self._lock:
+            self._entries[self.key(account_id, kind, file_path)] = {
+                "value": value,
+                "file": os.path.basename(file_path),
+                "uploaded_at": int(time.time()),
+            }
+            self._save()
+
+    def get_or_upload(self, account_id, kind, file_path, upload):
+        """Return the cached value for this file, calling upload(file_path) only on a miss."""
+        key = self.key(account_id, kind, file_path)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Concurrent workers asking for the same file wait for one upload instead of racing
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry:
+                print(f"♻️ Reusing cached {kind} for {os.path.basename(file_path)}: {entry['value']}")
+                return entry["value"]
+            value = upload(file_path)
+            if value:
+                self.put(account_id, kind, file_path, value)
+            return value
+
+    def invalidate(self, account_id, kind=None, value=None, file_path=None):
+        """Drop entries for the account, optionally narrowed to a kind, a cached value or a file."""
+        with self._lock:
+            digest = self.digest(file_path) if file_path else None
+            dropped = []
+            for key, entry in list(self._entries.items()):
+                acc, entry_kind, entry_digest = key.split(":", 2)
+                if acc != account_id or (kind and entry_kind != kind):
+                    continue
+                if (value and entry["value"] != value) or (digest and entry_digest != digest):
+                    continue
+                dropped.append(self._entries.pop(key)["value"])
+            if dropped:
+                self._save()
+        return dropped
+
+    def verify(self, account, api=None):
+        """Ask Meta about every cached image hash / video ID for the account and drop the unknown ones."""
+        account_id = account.get_id()
+        images = {e["value"] for k, e in self._entries.items() if k.startswith(f"{account_id}:image:")}
+        videos = {e["value"] for k, e in self._entries.items() if k.startswith(f"{account_id}:video:")}
+
+        stale = []
+        if images:
+            known = {img.get("hash") for img in account.get_ad_images(fields=["hash"], params={"hashes": list(images)})}
+            stale += [("image", h) for h in images - known]
+        if videos:
+            found, _ = get_by_ids(sorted(videos), ["id"], api)
+            stale += [("video", v) for v in sorted(videos) if v not in found]
+
+        for kind, value in stale:
+            self.invalidate(account_id, kind=kind, value=value)
+            print(f"🗑️ Dropped cached {kind} {value} - no longer known to Meta")
+        return stale
+
+    def _save(self):
+        save_json(self.path, self._entries, indent=2)
@@ -0,0 +1,93 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from prediction_poller import GraphStatusPoller, StatusPollFailed
+
+
+class VideoEncodingFailed(StatusPollFailed):
+    pass
+
+
+class VideoEncodingPoller(GraphStatusPoller):
+    """Checks the encoding status of every uploaded video in one ?ids= request per tick."""
+
+    fields = ['id', 'status']
+    failure_class = VideoEncodingFailed
+
+    def classify(self, record):
+        status = (record.get('status') or {}).get('video_status')
+        if status == 'ready':
+            return 'success', status, "ready"
+        if status in ('processing', None):
+            return 'pending', status, "encoding"
+        return 'failure', status, f"video encoding status: {status}"
+
+
+class MediaStage:
+    """
+    Uploads every video the plan needs at the start of the run and tracks their encoding together.
+
+    ready(path) returns a Future that resolves with the video ID as soon as that video is encoded,
+    so the creatives/ads that use it can be released one video at a time while campaign,
+    prediction and adset work carries on. Encoded IDs go into the media cache, so a later run
+    finds them ready immediately.
+    """
+
+    def __init__(self, account_id, media_cache, uploader, poller=None, workers=2):
+        self.account_id = account_id
+        self.media_cache = media_cache
+        self.uploader = uploader
+        self.poller = poller or VideoEncodingPoller()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="media-stage")
+        self._ready = {}
+        self._lock = threading.Lock()
+
+    def start(self, video_paths):
+        paths = sorted({p for p in video_paths if p})
+        if paths:
+            print(f"🎬 Pre-staging {len(paths)} video(s): {', '.join(os.path.basename(p) for p in paths)}")
+        for path in paths:
+            self.ready(path)
+
+    def ready(self, video_path):
+        """Future for the encoded video ID; starts the upload if the video was not pre-staged."""
+        with self._lock:
+            if video_path in self._ready:
+                return self._ready[video_path]
+            future = Future()
+            self._ready[video_path] = future
+
+        cached_id = self.media_cache.get(self.account_id, "video", video_path)
+        if cached_id:
+            print(f"♻️ Reusing cached video for {os.path.basename(video_path)}: {cached_id}")
+            future.set_result(cached_id)
+        else:
+            self._pool.submit(self._upload, video_path, future)
+        return future
+
+    def video_id(self, video_path, timeout=None):
+        return self.ready(video_path).result(timeout)
+
+    def _upload(self, video_path, future):
+        try:
+            video_id = self.uploader.upload(video_path)
+            print(f"📤 Uploaded {os.path.basename(video_path)} as video {video_id}, waiting for encoding...")
+        except Exception as e:
+            print(f"❌ Video upload failed for {video_path}: {e}")
+            future.set_exception(e)
+            return
+
+        def _encoded(encoding):
+            if encoding.exception():
+                print(f"❌ Video {video_id} could not be encoded: {encoding.exception()}")
+                future.set_exception(encoding.exception())
+                return
+            self.media_cache.put(self.account_id, "video", video_path, video_id)
+            print(f"✅ Video {video_id} is encoded and ready")
+            future.set_result(video_id)
+
+        self.poller.track(video_id, callback=_encoded)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
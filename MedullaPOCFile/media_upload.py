@@ -0,0 +1,265 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from facebook_business.api import FacebookAdsApi, FacebookResponse
+from facebook_business.exceptions import FacebookRequestError
+from facebook_business.session import FacebookSession
+
+from media_cache import file_digest
+
+# Bytes read from disk per send() - peak memory for an upload stays around this size
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class MultipartFileStream:
+    """
+    File-like multipart/form-data body for a single file field.
+
+    requests sees a read()-able object with a known length, so it sends Content-Length and
+    streams the body in STREAM_BUFFER_SIZE pieces instead of building it in memory
+    (which is what both params={"bytes": base64} and files={...} do).
+    """
+
+    def __init__(self, field_name, file_path, buffer_size=STREAM_BUFFER_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.buffer_size = buffer_size
+        file_name = os.path.basename(file_path)
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._file_size = os.path.getsize(file_path)
+        self._file = open(file_path, "rb")
+        self._pos = 0
+
+    def __len__(self):
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.buffer_size
+        out = b""
+        while len(out) < size:
+            head_end = len(self._head)
+            file_end = head_end + self._file_size
+            if self._pos < head_end:
+                piece = self._head[self._pos:self._pos + size - len(out)]
+            elif self._pos < file_end:
+                piece = self._file.read(min(size - len(out), file_end - self._pos))
+            else:
+                piece = self._tail[self._pos - file_end:self._pos - file_end + size - len(out)]
+            if not piece:
+                break
+            out += piece
+            self._pos += len(piece)
+        return out
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def post_file(path, field_name, file_path, params=None, api=None):
+    """POST one file as a streamed multipart body through the SDK's session and return the FacebookResponse."""
+    api = api or FacebookAdsApi.get_default_api()
+    url = "/".join((FacebookSession.GRAPH, api._api_version, "/".join(map(str, path))))
+    with MultipartFileStream(field_name, file_path) as body:
+        response = api._session.requests.post(
+            url,
+            params=params,
+            data=body,
+            headers={**FacebookAdsApi.HTTP_DEFAULT_HEADERS, "Content-Type": body.content_type},
+            timeout=api._session.timeout,
+        )
+    fb_response = FacebookResponse(
+        body=response.text,
+        headers=response.headers,
+        http_status=response.status_code,
+        call={"method": "POST", "path": url, "params": params, "headers": {}, "files": {field_name: file_path}},
+    )
+    if fb_response.is_failure():
+        raise fb_response.error()
+    return fb_response
+
+
+def upload_image_file(account_id, image_path, api=None):
+    """Upload an image to the ad account's image library, streamed from disk, and return its hash."""
+    response = post_file((account_id, "adimages"), "filename", image_path, api=api).json()
+    images = response.get("images") or {}
+    image = images.get(os.path.basename(image_path)) or next(iter(images.values()), {})
+    return image.get("hash")
+
+
+GRAPH_VIDEO = "https://graph-video.facebook.com"
+
+# Graph error subcode for "chunk sent at the wrong offset"; error_data carries the offsets it wants next
+WRONG_OFFSET_SUBCODE = 1363037
+
+
+class ChunkedVideoUploader:
+    """
+    Uploads a video with the Graph chunked-upload protocol (start / transfer / finish).
+
+    Chunks are sent `parallel` at a time. Every acknowledged chunk is written to a progress file
+    under .meta_cache/uploads, so a rerun after a network failure reuses the same upload session
+    and only sends the chunks that were not acknowledged. If Graph rejects out-of-order chunks
+    (subcode 1363037) the rest of the file is sent sequentially from the offset it asks for, and
+    that offset is saved too. A saved session Graph no longer accepts is dropped and the upload
+    starts over.
+
+    upload() returns the video ID as soon as the finish phase is accepted; it does not wait
+    for encoding.
+    """
+
+    def __init__(self, account_id, parallel=4, chunk_size=None, retries=3,
+                 progress_dir=os.path.join(".meta_cache", "uploads"), api=None):
+        self.account_id = account_id
+        self.parallel = parallel
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.progress_dir = progress_dir
+        self.api = api
+
+    def upload(self, video_path):
+        api = self.api or FacebookAdsApi.get_default_api()
+        file_size = os.path.getsize(video_path)
+        progress_path = os.path.join(self.progress_dir, f"{self.account_id}_{file_digest(video_path)}.json")
+        progress = self._load_progress(progress_path, file_size)
+
+        if progress:
+            print(f"↩️ Resuming upload of {os.path.basename(video_path)}: {len(progress['done'])}/{len(self._chunks(progress))} chunks already sent")
+            try:
+                return self._upload_session(api, video_path, progress, progress_path)
+            except FacebookRequestError as e:
+                if e.api_transient_error():
+                    raise
+                # The saved session expired or was rejected; it would fail the same way on every rerun
+                print(f"⚠️ Saved upload session for {os.path.basename(video_path)} is no longer usable ({e.api_error_message()}); starting over")
+                os.remove(progress_path)
+
+        start = self._post(api, {"upload_phase": "start", "file_size": file_size})
+        suggested = int(start["end_offset"]) - int(start["start_offset"])
+        progress = {
+            "upload_session_id": start["upload_session_id"],
+            "video_id": start["video_id"],
+            "file_size": file_size,
+            "chunk_size": self.chunk_size or suggested or file_size,
+            "done": [],
+        }
+        self._save_progress(progress_path, progress)
+        return self._upload_session(api, video_path, progress, progress_path)
+
+    def _upload_session(self, api, video_path, progress, progress_path):
+        if progress.get("sequential"):
+            self._transfer_sequential(api, video_path, progress, progress_path, *progress["sequential"])
+        else:
+            try:
+                self._transfer(api, video_path, progress, progress_path)
+            except FacebookRequestError as e:
+                if not self._offset_hint(e):
+                    raise
+                self._transfer_sequential(api, video_path, progress, progress_path, *self._offset_hint(e))
+
+        self._post(api, {
+            "upload_phase": "finish",
+            "upload_session_id": progress["upload_session_id"],
+            "title": os.path.basename(video_path),
+        })
+        os.remove(progress_path)
+        return progress["video_id"]
+
+    def _chunks(self, progress):
+        size, step = progress["file_size"], progress["chunk_size"]
+        return [(offset, min(offset + step, size)) for offset in range(0, size, step)]
+
+    def _transfer(self, api, video_path, progress, progress_path):
+        lock = threading.Lock()
+        todo = [c for c in self._chunks(progress) if c[0] not in set(progress["done"])]
+
+        def send(chunk):
+            start_offset, end_offset = chunk
+            self._send_chunk(api, video_path, progress["upload_session_id"], start_offset, end_offset)
+            with lock:
+                progress["done"].append(start_offset)
+                self._save_progress(progress_path, progress)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.parallel)) as pool:
+            for future in [pool.submit(send, chunk) for chunk in todo]:
+                future.result()
+
+    def _transfer_sequential(self, api, video_path, progress, progress_path, start_offset, end_offset):
+        print("⚠️ Graph wants chunks in order - sending the rest of the video sequentially")
+        while start_offset < end_offset:
+            # The next range Graph asked for is saved, so a rerun continues the sequence from there
+            progress["sequential"] = [start_offset, end_offset]
+            self._save_progress(progress_path, progress)
+            try:
+                response = self._send_chunk(api, video_path, progress["upload_session_id"], start_offset, end_offset)
+            except FacebookRequestError as e:
+                # e.g. resuming after a chunk Graph took but never acknowledged: continue where it says
+                if not self._offset_hint(e):
+                    raise
+                start_offset, end_offset = self._offset_hint(e)
+                continue
+            start_offset, end_offset = int(response["start_offset"]), int(response["end_offset"])
+        progress["sequential"] = [start_offset, end_offset]
+        self._save_progress(progress_path, progress)
+
+    def _send_chunk(self, api, video_path, session_id, start_offset, end_offset):
+        with open(video_path, "rb") as f:
+            f.seek(start_offset)
+            chunk = f.read(end_offset - start_offset)
+        for attempt in range(self.retries + 1):
+            try:
+                return self._post(
+                    api,
+                    {"upload_phase": "transfer", "upload_session_id": session_id, "start_offset": start_offset},
+                    files={"video_file_chunk": (os.path.basename(video_path), chunk, "multipart/form-data")},
+                )
+            except Exception as e:
+                # Wrong-offset errors are handled by the caller; anything else (network blip, 5xx) is retried
+                if (isinstance(e, FacebookRequestError) and self._offset_hint(e)) or attempt == self.retries:
+                    raise
+                print(f"⚠️ Chunk at offset {start_offset} failed, retrying ({attempt + 1}/{self.retries}): {e}")
+                time.sleep(2 ** attempt)
+
+    def _post(self, api, params, files=None):
+        return api.call("POST", (self.account_id, "advideos"), params=params, files=files, url_override=GRAPH_VIDEO).json()
+
+    @staticmethod
+    def _offset_hint(error):
+        if error.api_error_subcode() != WRONG_OFFSET_SUBCODE:
+            return None
+        data = (error.body() or {}).get("error", {}).get("error_data") or {}
+        if "start_offset" not in data:
+            return None
+        return int(data["start_offset"]), int(data["end_offset"])
+
+    def _load_progress(self, progress_path, file_size):
+        if not os.path.exists(progress_path):
+            return None
+        try:
+            with open(progress_path) as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return progress if progress.get("file_size") == file_size else None
+
+    def _save_progress(self, progress_path, progress):
+        os.makedirs(self.progress_dir, exist_ok=True)
+        tmp_path = f"{progress_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, progress_path)
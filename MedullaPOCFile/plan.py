@@ -0,0 +1,74 @@
+from collections import namedtuple
+
+import pandas as pd
+
+# One node of the compiled plan. `data` is a plain dict of the level's columns (same values the
+# drop_duplicates()/iterrows() rows used to carry) and `rows` are the input row positions it covers.
+CampaignSpec = namedtuple("CampaignSpec", ["name", "data", "rows", "adsets"])
+AdsetSpec = namedtuple("AdsetSpec", ["campaign_name", "name", "data", "rows", "ads"])
+AdSpec = namedtuple("AdSpec", ["campaign_name", "adset_name", "name", "data", "rows"])
+
+
+def _key(values):
+    # NaN never equals itself, so blank cells would otherwise split identical rows apart
+    return tuple(None if pd.isna(v) else v for v in values)
+
+
+def is_blank(data):
+    return all(pd.isna(v) for v in data.values())
+
+
+def compile_plan(df, campaign_columns, adset_columns, ad_columns):
+    """
+    Build the Campaign -> Adset -> Ad tree for the input sheet in a single pass over its rows.
+
+    Levels are de-duplicated on their own columns exactly like
+    df[campaign_columns].drop_duplicates(), the per-campaign adset filter and the per-adset ad
+    filter did, in first-seen order. Adsets are grouped by campaign name and ads by
+    (campaign name, adset name), as those filters selected them.
+    """
+    columns = list(dict.fromkeys([*campaign_columns, *adset_columns, *ad_columns]))
+    position = {column: i for i, column in enumerate(columns)}
+    camp_at = [position[c] for c in campaign_columns]
+    adset_at = [position[c] for c in adset_columns]
+    ad_at = [position[c] for c in ad_columns]
+
+    campaigns = {}
+    adsets_by_campaign = {}
+    adsets = {}
+    ads_by_adset = {}
+    ads = {}
+
+    for row, values in enumerate(df[columns].itertuples(index=False, name=None)):
+        camp_values = [values[i] for i in camp_at]
+        adset_values = [values[i] for i in adset_at]
+        ad_values = [values[i] for i in ad_at]
+        cname = values[position["campaign_name"]]
+        adset_name = values[position["adset_name"]]
+        campaign_key = _key([cname])
+        adset_group = _key([cname, adset_name])
+
+        key = _key(camp_values)
+        if key not in campaigns:
+            campaigns[key] = CampaignSpec(
+                cname, dict(zip(campaign_columns, camp_values)), [],
+                adsets_by_campaign.setdefault(campaign_key, []),
+            )
+        campaigns[key].rows.append(row)
+
+        key = campaign_key + _key(adset_values)
+        if key not in adsets:
+            adsets[key] = AdsetSpec(
+                cname, adset_name, dict(zip(adset_columns, adset_values)), [],
+                ads_by_adset.setdefault(adset_group, []),
+            )
+            adsets_by_campaign.setdefault(campaign_key, []).append(adsets[key])
+        adsets[key].rows.append(row)
+
+        key = adset_group + _key(ad_values)
+        if key not in ads:
+            ads[key] = AdSpec(cname, adset_name, values[position["ad_name"]], dict(zip(ad_columns, ad_values)), [])
+            ads_by_adset.setdefault(adset_group, []).append(ads[key])
+        ads[key].rows.append(row)
+
+    return list(campaigns.values())
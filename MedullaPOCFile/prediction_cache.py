@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from graph_io import CACHE_DIR, load_json, save_json
+
+# Prediction parameters that decide what Meta computes, plus campaign_id: a prediction can only
+# back an adset in the campaign it was created for
+KEY_PARAMS = [
+    "campaign_id", "objective", "buying_type", "optimization_goal", "budget", "frequency_cap",
+    "interval_frequency_cap_reset_period", "start_time", "end_time", "prediction_mode",
+    "destination_id", "story_event_type", "target_spec",
+]
+
+
+def canonical(value):
+    # Order-insensitive for lists of ids/keys: [{"id": 2}, {"id": 1}] and [{"id": 1}, {"id": 2}] target the same people
+    if isinstance(value, dict):
+        return {k: canonical(v) for k, v in value.items() if v not in (None, [], {})}
+    if isinstance(value, (list, tuple)):
+        items = [canonical(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def prediction_key(account_id, params):
+    """SHA-256 of the account plus the canonical JSON of the prediction parameters in KEY_PARAMS."""
+    spec = {k: canonical(params.get(k)) for k in KEY_PARAMS}
+    blob = json.dumps([account_id, spec], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class PredictionCache:
+    """
+    Completed, not yet reserved R&F predictions, grouped by prediction_key() and kept until they expire.
+
+    A prediction goes in once Meta has finished computing it and comes out when it is
+    reserved. A prediction only backs an adset in the campaign it was created for, so entries
+    also record that campaign: a plan re-run without --resume (which reads prediction IDs from
+    the journal instead) asks campaign_id() for it and creates its adsets there rather than in a
+    new campaign, and those adsets then reserve the finished predictions instead of submitting
+    and waiting for new ones.
+    take() hands each prediction to one adset only, since a prediction can back a single
+    reservation; adsets with identical parameters each get their own. A prediction put() by
+    this process stays claimed by the adset that computed it until release()d, so another
+    adset of the same run cannot take it while it is being reserved.
+    Entries within `margin` seconds of their expiration_time are treated as expired.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "prediction_cache.json"), margin=600):
+        self.path = path
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._entries = load_json(path, {}, "prediction cache")
+        self._claimed = set()
+
+    def take(self, account_id, params):
+        """Remove and return (prediction_id, expiration_time) cached for these parameters, or (None, None)."""
+        key = prediction_key(account_id, params)
+        with self._lock:
+            self._drop_expired()
+            entries = self._entries.get(key) or []
+            entry = next((e for e in entries if e["prediction_id"] not in self._claimed), None)
+            if entry:
+                entries.remove(entry)
+                if not entries:
+                    del self._entries[key]
+                self._save()
+        return (entry["prediction_id"], entry["expiration_time"]) if entry else (None, None)
+
+    def put(self, account_id, params, prediction_id, expiration_time, campaign_name=None):
+        if not expiration_time or int(expiration_time) - self.margin <= time.time():
+            return
+        with self._lock:
+            self._claimed.add(str(prediction_id))
+            entries = self._entries.setdefault(prediction_key(account_id, params), [])
+            if all(e["prediction_id"] != str(prediction_id) for e in entries):
+                entries.append({
+                    "prediction_id": str(prediction_id), "expiration_time": int(expiration_time),
+                    "account_id": account_id, "campaign_name": campaign_name, "campaign_id": params.get("campaign_id"),
+                })
+                self._save()
+
+    def campaign_id(self, account_id, campaign_name):
+        """The campaign an earlier run created for campaign_name, if unreserved predictions are still cached for it."""
+        with self._lock:
+            if self._drop_expired():
+                self._save()
+            return next((
+                e["campaign_id"] for entries in self._entries.values() for e in entries
+                if e.get("campaign_name") == campaign_name and e.get("account_id") == account_id
+                and e.get("campaign_id") and e["prediction_id"] not in self._claimed
+            ), None)
+
+    def discard(self, prediction_id):
+        """Forget a prediction once it is reserved (or turned out to be unusable)."""
+        with self._lock:
+            self._claimed.discard(str(prediction_id))
+            if self._drop(lambda e: e["prediction_id"] == str(prediction_id)):
+                self._save()
+
+    def release(self, prediction_id):
+        """Let other adsets take a prediction its own adset could not reserve."""
+        with self._lock:
+            self._claimed.discard(str(prediction_id))
+
+    def _drop_expired(self):
+        now = time.time()
+        return self._drop(lambda e: e["expiration_time"] - self.margin <= now)
+
+    def _drop(self, predicate):
+        dropped = False
+        for key, entries in list(self._entries.items()):
+            kept = [e for e in entries if not predicate(e)]
+            dropped = dropped or len(kept) != len(entries)
+            if kept:
+                self._entries[key] = kept
+            else:
+                del self._entries[key]
+        return dropped
+
+    def _save(self):
+        save_json(self.path, self._entries, indent=2)
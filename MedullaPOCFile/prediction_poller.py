@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from facebook_business.exceptions import FacebookRequestError
+
+from graph_io import get_by_ids
+
+# R&F prediction status codes (1 success, 2 pending, 3+ failure) - see Scripts/Camp_adset_VideoAD.py
+PREDICTION_STATUS_MESSAGES = {
+    1: "SUCCESS - Ready to reserve",
+    2: "PENDING - Still processing",
+    3: "FAIL - Cannot reach audience - reach too broad or budget too high",
+    4: "FAIL - Invalid parameters",
+    17: "FAIL - Generic failure",
+}
+
+
+class StatusPollFailed(Exception):
+    def __init__(self, object_id, status, message):
+        super().__init__(f"{object_id}: {message}")
+        self.object_id = object_id
+        self.status = status
+
+
+class PredictionFailed(StatusPollFailed):
+    pass
+
+
+class GraphStatusPoller:
+    """
+    Tracks many Graph objects that are still processing and checks all of them with a
+    single multi-ID GET (?ids=a,b,c&fields=...) per tick instead of one sleeping loop per object.
+
+    track() hands back a Future that resolves with the object's fields once classify() reports a
+    terminal state. The wait between ticks grows exponentially (with jitter) while nothing changes
+    and drops back to base_interval whenever a new object is tracked.
+    """
+
+    fields = ['id']
+    failure_class = StatusPollFailed
+
+    def __init__(self, base_interval=5, max_interval=60, backoff=1.5, jitter=0.25, timeout=600, api=None):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.timeout = timeout
+        self.api = api
+        self._pending = {}  # object_id -> (future, deadline)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._ticks_without_change = 0
+
+    def classify(self, record):
+        """Return ('success' | 'pending' | 'failure', status, message) for one fetched record."""
+        raise NotImplementedError
+
+    def track(self, object_id, callback=None, timeout=None):
+        object_id = str(object_id)
+        with self._lock:
+            if object_id in self._pending:
+                future = self._pending[object_id][0]
+            else:
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self._pending[object_id] = (future, time.time() + (timeout or self.timeout))
+            self._ticks_without_change = 0
+            self._ensure_thread()
+            self._wakeup.notify()
+        if callback:
+            future.add_done_callback(callback)
+        return future
+
+    def wait(self, object_id, timeout=None):
+        """Blocking convenience wrapper: track the object and return its final record."""
+        return self.track(object_id, timeout=timeout).result()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+            self._thread.start()
+
+    def _next_delay(self):
+        delay = min(self.max_interval, self.base_interval * (self.backoff ** self._ticks_without_change))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        return
+                    self._wakeup.wait(self._next_delay())
+                    object_ids = list(self._pending)
+                try:
+                    changed = self.sweep(object_ids) if object_ids else True
+                except Exception as e:
+                    print(f"⚠️ Status poll failed, will retry: {e}")
+                    changed = self._expire(object_ids, f"status poll failing ({e})")
+                if not changed:
+                    self._ticks_without_change += 1
+        except BaseException as e:
+            # Nothing would resolve the tracked futures once this thread is gone, so fail them all
+            with self._lock:
+                pending, self._pending, self._thread = self._pending, {}, None
+            for object_id, (future, _) in pending.items():
+                future.set_exception(self.failure_class(object_id, None, f"status poller stopped: {e!r}"))
+            raise
+
+    def sweep(self, object_ids):
+        """Fetch the given objects in chunks of 50 and resolve the ones that finished. Returns True if any did."""
+        records, errors = get_by_ids(object_ids, self.fields, self.api)
+        changed = False
+        for object_id in object_ids:
+            changed |= self._resolve(object_id, records.get(object_id), errors.get(object_id))
+        return changed
+
+    def _expire(self, object_ids, message):
+        """Fail the objects whose deadline passed without a usable poll result. Returns True if any did."""
+        return any([self._resolve(object_id, None, message=message) for object_id in object_ids])
+
+    def _resolve(self, object_id, record, error=None, message="not returned by Graph yet"):
+        with self._lock:
+            entry = self._pending.get(object_id)
+            if entry is None:
+                return False
+            future, deadline = entry
+            status = None
+            if record is not None:
+                try:
+                    state, status, message = self.classify(record)
+                except Exception as e:
+                    state, message = 'failure', f"unexpected status record {record!r}: {e}"
+            elif isinstance(error, FacebookRequestError) and error.http_status() in (400, 404) and not error.api_transient_error():
+                state, message = 'failure', f"cannot be polled: {error.api_error_message()}"
+            else:
+                state = 'pending'
+                if error is not None:
+                    message = f"status poll failing ({error})"
+            if state == 'pending' and time.time() > deadline:
+                state, message = 'failure', f"timed out while {message}"
+            if state == 'pending':
+                return False
+            del self._pending[object_id]
+        if state == 'success':
+            future.set_result(record)
+        else:
+            future.set_exception(self.failure_class(object_id, status, message))
+        return True
+
+
+class PredictionPoller(GraphStatusPoller):
+    fields = ['id', 'status', 'expiration_time']
+    failure_class = PredictionFailed
+
+    def classify(self, record):
+        status = record.get('status')
+        message = PREDICTION_STATUS_MESSAGES.get(status, f"FAIL - Prediction failed with status {status}")
+        if status == 1:
+            return 'success', status, message
+        if status == 2 or status is None:
+            return 'pending', status, PREDICTION_STATUS_MESSAGES[2]
+        return 'failure', status, message
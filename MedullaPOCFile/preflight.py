@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from facebook_business.api import FacebookAdsApi
+
+from graph_io import CACHE_DIR, load_json, save_json
+from prediction_cache import canonical
+
+
+def spec_digest(account_id, target_spec):
+    """SHA-256 of the account plus the canonical JSON of a targeting spec."""
+    blob = json.dumps([account_id, canonical(target_spec)], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _audience_bounds(response):
+    # Newer API versions report a range, older ones a single "users" figure
+    data = response.get("data", response)
+    if isinstance(data, list):
+        data = data[0] if data else {}
+    lower = data.get("users_lower_bound", data.get("users"))
+    upper = data.get("users_upper_bound", lower)
+    if lower is None:
+        raise ValueError(f"No audience size in reach estimate: {response}")
+    return int(lower), int(upper)
+
+
+class AudienceEstimator:
+    """
+    Audience-size estimates (GET act_.../reachestimate) per targeting spec, cached on disk by spec_digest().
+
+    estimate_many() de-duplicates the specs and fetches only the uncached ones, all at once:
+    through the BatchTransport when one is given (50 per request), otherwise on `parallel`
+    threads. Estimates move slowly, so cached ones are reused for `ttl` seconds.
+    """
+
+    def __init__(self, account_id, path=os.path.join(CACHE_DIR, "reach_estimates.json"), ttl=24 * 3600,
+                 transport=None, parallel=8, api=None):
+        self.account_id = account_id
+        self.path = path
+        self.ttl = ttl
+        self.transport = transport
+        self.parallel = parallel
+        self.api = api
+        self._lock = threading.Lock()
+        self._entries = load_json(path, {}, "reach estimate cache")
+
+    def estimate_many(self, target_specs):
+        """{spec_digest: (users_lower_bound, users_upper_bound), or the exception fetching it failed with}."""
+        specs = {spec_digest(self.account_id, spec): spec for spec in target_specs}
+        now = time.time()
+        with self._lock:
+            estimates = {
+                digest: tuple(entry["users"]) for digest, entry in self._entries.items()
+                if digest in specs and now - entry["at"] < self.ttl
+            }
+        missing = {digest: spec for digest, spec in specs.items() if digest not in estimates}
+        if not missing:
+            return estimates
+
+        print(f"🔹 Fetching audience estimates for {len(missing)} targeting spec(s)...")
+        path = (self.account_id, "reachestimate")
+        pool = None
+        if self.transport:
+            futures = {
+                digest: self.transport.submit("GET", path, {"targeting_spec": spec, "optimization_goal": "REACH"}, label="reachestimate")
+                for digest, spec in missing.items()
+            }
+        else:
+            api = self.api or FacebookAdsApi.get_default_api()
+            pool = ThreadPoolExecutor(max_workers=max(1, self.parallel))
+            futures = {
+                digest: pool.submit(lambda spec: api.call("GET", path, params={
+                    "targeting_spec": json.dumps(spec), "optimization_goal": "REACH",
+                }).json(), spec)
+                for digest, spec in missing.items()
+            }
+
+        fetched = {}
+        for digest, future in futures.items():
+            try:
+                estimates[digest] = fetched[digest] = _audience_bounds(future.result())
+            except Exception as e:
+                estimates[digest] = e
+        if pool:
+            pool.shutdown()
+
+        with self._lock:
+            self._entries.update({digest: {"users": list(users), "at": int(now)} for digest, users in fetched.items()})
+            self._save()
+        return estimates
+
+    def _save(self):
+        save_json(self.path, self._entries)
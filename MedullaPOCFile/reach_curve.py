@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+
+import numpy as np
+from facebook_business.api import FacebookAdsApi
+
+from graph_io import CACHE_DIR, get_by_ids, load_json, save_json
+from prediction_poller import PREDICTION_STATUS_MESSAGES
+
+# Fields of a completed ReachFrequencyPrediction that describe its whole budget -> reach curve
+CURVE_FIELDS = [
+    "id", "status", "curve_budget_reach", "frequency_distribution_map",
+    "audience_size_lower_bound", "audience_size_upper_bound",
+]
+
+
+def as_map(value):
+    """
+    A Graph map field as one dict.
+
+    Older API versions return curve_budget_reach / frequency_distribution_map as JSON strings, and
+    the frequency maps are typed list<map<...>>, i.e. a list of {frequency: values} objects, which
+    are merged here.
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    if isinstance(value, (list, tuple)):
+        merged = {}
+        for part in value:
+            if isinstance(part, dict):
+                merged.update(part)
+        return merged
+    return value if isinstance(value, dict) else {}
+
+
+class ReachCurve:
+    """
+    The budget -> reach / impressions curve of one completed R&F prediction.
+
+    Meta computes the whole curve for every prediction, so "what would X buy" and "what does Y
+    reach cost" are answered here by interpolating between its points instead of submitting one
+    prediction per budget. Every lookup takes a scalar or an array and is vectorised, so thousands
+    of what-if points cost one np.interp call. Budgets are in the account currency's minor units,
+    the same as the prediction's `budget` parameter.
+    """
+
+    def __init__(self, prediction_id, budget, reach, impressions, frequency_distribution=None,
+                 audience_size_lower_bound=None, audience_size_upper_bound=None):
+        budget = np.asarray(budget, dtype=float)
+        order = np.argsort(budget, kind="stable")
+        budget, first = np.unique(budget[order], return_index=True)
+        picked = order[first]
+        if budget.size == 0:
+            raise ValueError(f"Prediction {prediction_id} has no curve points")
+
+        self.prediction_id = str(prediction_id)
+        self.audience_size_lower_bound = audience_size_lower_bound
+        self.audience_size_upper_bound = audience_size_upper_bound
+        # Reach and impressions never drop as budget grows; flatten noise so the curve can be inverted
+        self.budget = budget
+        self.reach = np.maximum.accumulate(np.asarray(reach, dtype=float)[picked])
+        self.impressions = np.maximum.accumulate(np.asarray(impressions, dtype=float)[picked])
+        # frequency -> reach at that frequency, per curve point (only kept when aligned with the curve)
+        self.frequency_distribution = {
+            int(k): np.asarray(v, dtype=float)[picked]
+            for k, v in as_map(frequency_distribution).items()
+            if isinstance(v, (list, tuple)) and len(v) == len(order)
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        """Build the curve from a fetched prediction (dict of CURVE_FIELDS)."""
+        curve = as_map(record.get("curve_budget_reach"))
+        return cls(
+            record["id"], curve.get("budget", []), curve.get("reach", []), curve.get("impression", []),
+            record.get("frequency_distribution_map"),
+            record.get("audience_size_lower_bound"), record.get("audience_size_upper_bound"),
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.prediction_id,
+            "curve_budget_reach": {
+                "budget": self.budget.tolist(), "reach": self.reach.tolist(), "impression": self.impressions.tolist(),
+            },
+            "frequency_distribution_map": {str(k): v.tolist() for k, v in self.frequency_distribution.items()},
+            "audience_size_lower_bound": self.audience_size_lower_bound,
+            "audience_size_upper_bound": self.audience_size_upper_bound,
+        }
+
+    def _at(self, budget, values):
+        # Below the first point the curve runs linearly from (0, 0); above the last it stays flat
+        result = np.interp(np.asarray(budget, dtype=float), np.r_[0.0, self.budget], np.r_[0.0, values])
+        return result if result.ndim else float(result)
+
+    def reach_at(self, budget):
+        return self._at(budget, self.reach)
+
+    def impressions_at(self, budget):
+        return self._at(budget, self.impressions)
+
+    def frequency_at(self, budget):
+        """Average frequency (impressions / reach) at each budget."""
+        reach = np.asarray(self.reach_at(budget), dtype=float)
+        impressions = np.asarray(self.impressions_at(budget), dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = np.where(reach > 0, impressions / reach, 0.0)
+        return result if result.ndim else float(result)
+
+    def reach_distribution_at(self, budget):
+        """{frequency: reach at that frequency} at each budget, from frequency_distribution_map."""
+        return {k: self._at(budget, v) for k, v in sorted(self.frequency_distribution.items())}
+
+    def budget_for_reach(self, reach):
+        """Smallest budget that reaches `reach` people; NaN where the curve never gets there."""
+        # Keep the first (cheapest) budget of every flat stretch so the inverse is a function
+        reach_points, first = np.unique(self.reach, return_index=True)
+        budget_points = self.budget[first]
+        result = np.interp(
+            np.asarray(reach, dtype=float), np.r_[0.0, reach_points], np.r_[0.0, budget_points], right=np.nan,
+        )
+        return result if result.ndim else float(result)
+
+    def budget_for_impressions(self, impressions):
+        """Smallest budget that buys `impressions` impressions; NaN beyond the end of the curve."""
+        impression_points, first = np.unique(self.impressions, return_index=True)
+        result = np.interp(
+            np.asarray(impressions, dtype=float), np.r_[0.0, impression_points], np.r_[0.0, self.budget[first]],
+            right=np.nan,
+        )
+        return result if result.ndim else float(result)
+
+
+class ReachCurveCache:
+    """
+    Reach curves of completed predictions, fetched once and kept in .meta_cache/reach_curves.json.
+
+    A completed prediction's curve never changes, so entries have no expiry. get_many() fetches
+    the missing curves with one multi-ID GET per 50 predictions.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "reach_curves.json"), api=None):
+        self.path = path
+        self.api = api
+        self._lock = threading.Lock()
+        self._records = load_json(path, {}, "reach curve cache")
+        self._curves = {}
+
+    def get(self, prediction_id):
+        return self.get_many([prediction_id])[str(prediction_id)]
+
+    def get_many(self, prediction_ids):
+        """{prediction_id: ReachCurve}; raises ValueError for a prediction that has not completed."""
+        prediction_ids = [str(p) for p in prediction_ids]
+        with self._lock:
+            missing = [p for p in dict.fromkeys(prediction_ids) if p not in self._records]
+        if missing:
+            fetched = self._fetch(missing)
+            with self._lock:
+                self._records.update(fetched)
+                self._save()
+
+        curves = {}
+        with self._lock:
+            for prediction_id in prediction_ids:
+                if prediction_id not in self._curves:
+                    self._curves[prediction_id] = ReachCurve.from_record(self._records[prediction_id])
+                curves[prediction_id] = self._curves[prediction_id]
+        return curves
+
+    def _fetch(self, prediction_ids):
+        print(f"🔹 Fetching reach curves for {len(prediction_ids)} prediction(s)...")
+        response, errors = get_by_ids(prediction_ids, CURVE_FIELDS, self.api)
+        records = {}
+        for prediction_id in prediction_ids:
+            if prediction_id in errors:
+                raise errors[prediction_id]
+            record = response.get(prediction_id)
+            status = (record or {}).get("status")
+            if status != 1:
+                message = PREDICTION_STATUS_MESSAGES.get(status, f"not returned by Graph (status {status})")
+                raise ValueError(f"Prediction {prediction_id} has no final curve: {message}")
+            # Keep only the curve; status and the rest are not needed once it is complete
+            records[prediction_id] = ReachCurve.from_record(record).to_dict()
+        return records
+
+    def _save(self):
+        save_json(self.path, self._records)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import load_dotenv
+
+    from throttle import default_throttle
+
+    parser = argparse.ArgumentParser(description="What-if reach / budget lookups on a completed R&F prediction's curve")
+    parser.add_argument("prediction_id")
+    parser.add_argument("--budget", type=float, nargs="*", default=[], help="Budgets (minor units) to look up reach for")
+    parser.add_argument("--reach", type=float, nargs="*", default=[], help="Reach targets to look up the budget for")
+    args = parser.parse_args()
+
+    load_dotenv()
+    FacebookAdsApi.init(os.getenv("FB_APP_ID"), os.getenv("FB_APP_SECRET"), os.getenv("FB_ACCESS_TOKEN"))
+    default_throttle.install()
+
+    curve = ReachCurveCache().get(args.prediction_id)
+    print(f"📈 Prediction {curve.prediction_id}: {curve.budget.size} curve points, "
+          f"budget {curve.budget[0]:.0f}-{curve.budget[-1]:.0f}, max reach {curve.reach[-1]:.0f}")
+    if args.budget:
+        budgets = np.asarray(args.budget)
+        for budget, reach, impressions, frequency in zip(
+                budgets, curve.reach_at(budgets), curve.impressions_at(budgets), curve.frequency_at(budgets)):
+            print(f"   budget {budget:.0f}: reach {reach:.0f}, impressions {impressions:.0f}, frequency {frequency:.2f}")
+    if args.reach:
+        for reach, budget in zip(args.reach, curve.budget_for_reach(np.asarray(args.reach))):
+            print(f"   reach {reach:.0f}: " + ("not reachable on this curve" if np.isnan(budget) else f"budget {budget:.0f}"))
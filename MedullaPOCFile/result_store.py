@@ -0,0 +1,62 @@
+import threading
+
+
+class ResultStore:
+    """
+    Collects per-row results (IDs and logs) for the input plan without scanning final_df.
+
+    Row positions for every campaign, (campaign, adset) and (campaign, adset, ad) group are built
+    once from the input frame, so each write only touches the rows of its group. The results are
+    kept in plain per-column lists and turned into a DataFrame by to_frame() at the end of the run.
+    Safe to write from several worker threads.
+    """
+
+    def __init__(self, df, columns):
+        self.df = df
+        self._lock = threading.Lock()
+        self._columns = {column: [''] * len(df) for column in columns}
+        self._campaigns = self._index(['campaign_name'])
+        self._adsets = self._index(['campaign_name', 'adset_name'])
+        self._ads = self._index(['campaign_name', 'adset_name', 'ad_name'])
+
+    def _index(self, keys):
+        groups = self.df.groupby(keys, sort=False, dropna=False).indices
+        # groupby keys a single column by its value and several columns by a tuple; always use tuples
+        return {(k if isinstance(k, tuple) else (k,)): list(v) for k, v in groups.items()}
+
+    def campaign_rows(self, campaign_name):
+        return self._campaigns.get((campaign_name,), [])
+
+    def adset_rows(self, campaign_name, adset_name):
+        return self._adsets.get((campaign_name, adset_name), [])
+
+    def ad_rows(self, campaign_name, adset_name, ad_name):
+        return self._ads.get((campaign_name, adset_name, ad_name), [])
+
+    def set_campaign(self, campaign_name, **values):
+        self._set(self.campaign_rows(campaign_name), values)
+
+    def set_adset(self, campaign_name, adset_name, **values):
+        self._set(self.adset_rows(campaign_name, adset_name), values)
+
+    def set_ad(self, campaign_name, adset_name, ad_name, **values):
+        self._set(self.ad_rows(campaign_name, adset_name, ad_name), values)
+
+    def _set(self, rows, values):
+        with self._lock:
+            for column, value in values.items():
+                if column not in self._columns:
+                    self._columns[column] = [''] * len(self.df)
+                target = self._columns[column]
+                for row in rows:
+                    target[row] = value
+
+    def to_frame(self):
+        out = self.df.copy()
+        with self._lock:
+            for column, values in self._columns.items():
+                out[column] = values
+        return out
+
+    def save(self, path):
+        self.to_frame().to_csv(path, index=False)
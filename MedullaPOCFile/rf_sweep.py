@@ -0,0 +1,148 @@
+import itertools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from prediction_poller import PredictionPoller
+from reach_curve import as_map
+
+# Prediction fields the objectives below score a finished variant on
+RESULT_FIELDS = ['external_budget', 'external_reach', 'external_impression', 'frequency_distribution_map_agg']
+
+# One finished variant of a sweep; higher score is better
+SweepResult = namedtuple("SweepResult", ["score", "prediction_id", "params", "record"])
+
+
+class SweepPoller(PredictionPoller):
+    """PredictionPoller that also fetches what a sweep ranks on, so one poller serves plain and swept adsets."""
+    fields = PredictionPoller.fields + RESULT_FIELDS
+
+
+def _number(value):
+    # frequency_distribution_map_agg values come back as a number or as a one-element list
+    if isinstance(value, (list, tuple)):
+        value = value[-1] if value else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def cost_per_reach(record, min_frequency):
+    budget, reach = _number(record.get('external_budget')), _number(record.get('external_reach'))
+    return -budget / reach if budget and reach else None
+
+
+def reach(record, min_frequency):
+    return _number(record.get('external_reach'))
+
+
+def impressions(record, min_frequency):
+    return _number(record.get('external_impression'))
+
+
+def reach_at_frequency(record, min_frequency):
+    """People reached at least `min_frequency` times."""
+    # Typed list<map<frequency, list>>; as_map merges the maps into one dict
+    distribution = as_map(record.get('frequency_distribution_map_agg'))
+    counts = [_number(v) for k, v in distribution.items() if str(k).isdigit() and int(k) >= min_frequency]
+    counts = [c for c in counts if c is not None]
+    return sum(counts) if counts else None
+
+
+OBJECTIVES = {
+    'cost_per_reach': cost_per_reach,
+    'reach': reach,
+    'impressions': impressions,
+    'reach_at_frequency': reach_at_frequency,
+}
+
+
+def expand_grid(params, grid):
+    """
+    Every combination of the grid's values applied over the base prediction params, duplicates removed.
+
+    Grid keys are prediction parameters ('frequency_cap', 'interval_frequency_cap_reset_period',
+    'prediction_mode', ...) plus 'budget_multiplier', which scales params['budget']. A key with
+    an empty list keeps the base value.
+    """
+    keys = [k for k, values in grid.items() if values]
+    variants = []
+    seen = set()
+    for values in itertools.product(*(grid[k] for k in keys)):
+        variant = dict(params)
+        for key, value in zip(keys, values):
+            if key == 'budget_multiplier':
+                variant['budget'] = int(round(params['budget'] * value))
+            else:
+                variant[key] = value
+        signature = tuple(variant.get(k) for k in ('budget', *keys))
+        if signature not in seen:
+            seen.add(signature)
+            variants.append(variant)
+    return variants
+
+
+class RFSweep:
+    """
+    Tries a grid of R&F prediction variants for one adset and ranks the finished ones by an objective.
+
+    All variants are submitted at once (`parallel` creates in flight) and tracked by the shared
+    poller, so a sweep costs one status request per tick however many variants it has. run()
+    only predicts; reserving is left to the caller, and the variants it does not reserve simply
+    expire on Meta's side.
+    """
+
+    def __init__(self, account, poller, grid, objective='cost_per_reach', min_frequency=2, parallel=4):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown sweep objective {objective!r}; choose from {', '.join(OBJECTIVES)}")
+        self.account = account
+        self.poller = poller
+        self.grid = grid
+        self.objective = objective
+        self.min_frequency = min_frequency
+        self.parallel = parallel
+
+    def score(self, record):
+        return OBJECTIVES[self.objective](record, self.min_frequency)
+
+    def _submit(self, params):
+        try:
+            return self.account.create_reach_frequency_prediction(fields=[], params=params).get("id")
+        except Exception as e:
+            print(f"❌ Sweep variant failed (budget {params['budget']}, frequency_cap {params.get('frequency_cap')}): {e}")
+            return None
+
+    def run(self, params, label=""):
+        """Predict every variant of `params`; returns SweepResults best first (empty if none finished)."""
+        variants = expand_grid(params, self.grid)
+        print(f"\n🔹 Sweeping {len(variants)} prediction variant(s) for {label} by {self.objective}...")
+        with ThreadPoolExecutor(max_workers=max(1, self.parallel)) as executor:
+            prediction_ids = list(executor.map(self._submit, variants))
+
+        tracked = {
+            self.poller.track(prediction_id): (prediction_id, variant)
+            for prediction_id, variant in zip(prediction_ids, variants) if prediction_id
+        }
+        wait(tracked)
+
+        results = []
+        for future, (prediction_id, variant) in tracked.items():
+            if future.exception():
+                print(f"❌ Sweep variant {prediction_id} failed: {future.exception()}")
+                continue
+            score = self.score(future.result())
+            if score is None:
+                print(f"⚠️ Sweep variant {prediction_id} has no {self.objective} to rank on")
+                continue
+            results.append(SweepResult(score, prediction_id, variant, future.result()))
+        results.sort(key=lambda r: r.score, reverse=True)
+
+        # One print per sweep so concurrent adsets' rankings do not interleave
+        print("\n".join([f"📊 Sweep ranking for {label}:"] + [
+            f"   {rank}. {r.prediction_id}: budget {r.params['budget']}, "
+            f"frequency_cap {r.params.get('frequency_cap')}/{r.params.get('interval_frequency_cap_reset_period')}h, "
+            f"reach {r.record.get('external_reach')}, impressions {r.record.get('external_impression')}, "
+            f"{self.objective} {abs(r.score):.4g}"
+            for rank, r in enumerate(results, 1)
+        ]))
+        return results
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+import time
+
+from graph_io import CACHE_DIR
+from media_cache import file_digest
+
+
+class RunJournal:
+    """
+    Append-only JSONL log of every entity a bulk run has created, keyed by its plan node.
+
+    Each record is one line such as
+        {"kind": "adset", "key": ["Camp0", "Camp0_Adset0"], "rows": [0, 1], "values": {"adset_id": "..."}, "at": ...}
+    written and fsync'd as soon as the ID comes back from Meta, so a run killed by Ctrl-C,
+    an expired token or a crash loses nothing it already created. Later records for the same
+    key are merged over earlier ones. A torn last line (killed mid-write) is ignored on load.
+
+    The journal file is named after the SHA-256 of the input sheet, so resuming only ever
+    picks up IDs created from the same plan.
+    """
+
+    def __init__(self, input_path, resume=False, journal_dir=CACHE_DIR):
+        self.path = os.path.join(journal_dir, f"run_journal_{file_digest(input_path)[:16]}.jsonl")
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        os.makedirs(journal_dir, exist_ok=True)
+        if resume and os.path.exists(self.path):
+            self._load()
+            print(f"↩️ Resuming from {self.path}: {len(self._entries)} plan entries already recorded")
+        elif os.path.exists(self.path):
+            # A fresh run must not mix its IDs with an older, abandoned run of the same sheet
+            os.replace(self.path, f"{self.path}.{int(time.time())}.old")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._entries.setdefault((record["kind"], tuple(record["key"])), {}).update(record["values"])
+
+    def get(self, kind, *key):
+        """Everything recorded so far for this plan node, e.g. journal.get("adset", cname, adset_name)."""
+        with self._lock:
+            return dict(self._entries.get((kind, key), {}))
+
+    def record(self, kind, *key, rows=(), **values):
+        values = {k: v for k, v in values.items() if v}
+        if not values:
+            return
+        line = json.dumps({"kind": kind, "key": list(key), "rows": [int(r) for r in rows], "values": values, "at": int(time.time())})
+        with self._lock:
+            self._entries.setdefault((kind, key), {}).update(values)
+            if self._file.closed:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+from graph_io import CACHE_DIR, get_by_ids, load_json, save_json
+
+FIELDS = ['id', 'name', 'time_updated', 'targeting']
+
+
+class SavedAudienceCache:
+    """
+    Saved audiences fetched directly by ID, with their targeting cached on disk by ID and time_updated.
+
+    get_many() first asks Meta only for the time_updated of the audiences it has not checked in
+    the last `recheck_after` seconds (one multi-ID GET per 50), then downloads name and targeting
+    just for the ones that are new or were edited since they were cached. Callers in the same
+    process wait on one shared fetch; other scripts reuse the file. If Meta cannot be reached the
+    cached copy is served with a warning.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "saved_audiences.json"), recheck_after=600, api=None):
+        self.path = path
+        self.recheck_after = recheck_after
+        self.api = api
+        self._lock = threading.Lock()
+        self._entries = load_json(path, {}, "saved audience cache")
+
+    def get(self, audience_id):
+        """{'id', 'name', 'time_updated', 'targeting'} for a saved audience, or None if Meta does not return it."""
+        return self.get_many([audience_id]).get(str(audience_id))
+
+    def get_many(self, audience_ids):
+        ids = list(dict.fromkeys(str(i) for i in audience_ids))
+        with self._lock:
+            now = time.time()
+            stale = [i for i in ids if i not in self._entries or now - self._entries[i]["checked_at"] >= self.recheck_after]
+            if stale:
+                self._refresh(stale, now)
+            return {i: {field: self._entries[i][field] for field in FIELDS} for i in ids if i in self._entries}
+
+    def _refresh(self, audience_ids, now):
+        versions, errors = get_by_ids(audience_ids, ['id', 'time_updated'], self.api)
+        changed = [
+            i for i in audience_ids
+            if i in versions and self._entries.get(i, {}).get('time_updated') != versions[i].get('time_updated')
+        ]
+        full, full_errors = get_by_ids(changed, FIELDS, self.api) if changed else ({}, {})
+        errors.update(full_errors)
+        for audience_id, e in errors.items():
+            print(f"⚠️ Could not check saved audience {audience_id} with Meta: {e}")
+        for audience_id in audience_ids:
+            if audience_id in errors:
+                # Keep serving the cached copy (if any) until Meta can be asked again
+                continue
+            if audience_id in full:
+                record = full[audience_id]
+                print(f"🔹 Fetched saved audience {record.get('name')} ({audience_id})")
+                self._entries[audience_id] = {**{field: record.get(field) for field in FIELDS}, "checked_at": int(now)}
+            elif audience_id in versions and audience_id in self._entries:
+                self._entries[audience_id]["checked_at"] = int(now)
+            else:
+                self._entries.pop(audience_id, None)
+        self._save()
+
+    def _save(self):
+        save_json(self.path, self._entries)
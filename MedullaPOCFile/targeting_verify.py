@@ -0,0 +1,102 @@
+import threading
+
+from graph_io import get_by_ids
+
+
+def _is_empty(value):
+    return value is None or value == [] or value == {} or value == ""
+
+
+def _identity(item):
+    # Targeting entries are identified by id (interests, audiences) or key (regions, cities); names as a last resort
+    if isinstance(item, dict):
+        return str(item.get("id") or item.get("key") or item.get("name") or sorted(item.items()))
+    return str(item)
+
+
+def targeting_diff(sent, stored, path="targeting"):
+    """
+    Differences between a submitted targeting spec and the one Meta stored, as readable strings.
+
+    Only what was sent is checked: fields Meta adds or fills in are ignored. Lists of entries are
+    compared as sets of their id / key, so ordering and the names Meta adds do not count.
+    """
+    if isinstance(sent, dict):
+        if not isinstance(stored, dict):
+            return [f"{path}: sent an object, stored {stored!r}"]
+        found = []
+        for key, value in sent.items():
+            if _is_empty(value):
+                continue
+            if _is_empty(stored.get(key)):
+                found.append(f"{path}.{key}: missing")
+            else:
+                found.extend(targeting_diff(value, stored[key], f"{path}.{key}"))
+        return found
+    if isinstance(sent, (list, tuple)):
+        stored = stored if isinstance(stored, (list, tuple)) else [stored]
+        if any(isinstance(v, dict) and not ({"id", "key", "name"} & set(v)) for v in sent):
+            # Lists of nested specs (flexible_spec) are matched position by position
+            if len(sent) != len(stored):
+                return [f"{path}: sent {len(sent)} entries, stored {len(stored)}"]
+            return [d for i, (a, b) in enumerate(zip(sent, stored)) for d in targeting_diff(a, b, f"{path}[{i}]")]
+        sent_ids, stored_ids = {_identity(v) for v in sent}, {_identity(v) for v in stored}
+        found = []
+        if sent_ids - stored_ids:
+            found.append(f"{path}: missing {', '.join(sorted(sent_ids - stored_ids))}")
+        if stored_ids - sent_ids:
+            found.append(f"{path}: unexpected {', '.join(sorted(stored_ids - sent_ids))}")
+        return found
+    if str(sent).lower() != str(stored).lower():
+        return [f"{path}: sent {sent!r}, stored {stored!r}"]
+    return []
+
+
+class TargetingVerifier:
+    """
+    Checks the targeting Meta stored for created adsets against what was submitted.
+
+    expect() registers an adset as soon as it is created; verify() fetches every adset registered
+    since the last call with one multi-ID GET (?ids=a,b,c&fields=...) per 50 and diffs the targeting
+    locally, instead of one api_get per adset while the run is still creating others. Top-level
+    fields passed as `ignore` (ones Meta is known to drop for that kind of adset) are not checked.
+
+    verify() returns {key: verdict} where verdict is "OK", "MISMATCH: ..." or "NOT VERIFIED: ...".
+    """
+
+    fields = ['id', 'name', 'status', 'targeting']
+
+    def __init__(self, api=None):
+        self.api = api
+        self._lock = threading.Lock()
+        self._expected = {}  # adset_id -> (key, submitted targeting)
+
+    def expect(self, adset_id, targeting, key=None, ignore=()):
+        targeting = {k: v for k, v in targeting.items() if k not in ignore}
+        with self._lock:
+            self._expected[str(adset_id)] = (key or str(adset_id), targeting)
+
+    def verify(self):
+        with self._lock:
+            expected, self._expected = self._expected, {}
+        if not expected:
+            return {}
+
+        print(f"\n🔍 Verifying the targeting of {len(expected)} ad set(s) with Meta...")
+        records, errors = get_by_ids(list(expected), self.fields, self.api)
+        verdicts = {}
+        for adset_id, (key, targeting) in expected.items():
+            record = records.get(adset_id)
+            if record is None:
+                error = errors.get(adset_id, "not returned by Graph")
+                print(f"⚠️ Could not fetch ad set {adset_id} for verification: {error}")
+                verdicts[key] = f"NOT VERIFIED: {error}"
+                continue
+            mismatches = targeting_diff(targeting, record.get('targeting') or {})
+            verdicts[key] = f"MISMATCH: {'; '.join(mismatches)}" if mismatches else "OK"
+            if mismatches:
+                print(f"⚠️ Ad set {record.get('name', adset_id)} ({adset_id}) targeting differs from what was sent:")
+                for mismatch in mismatches:
+                    print(f"   {mismatch}")
+        print(f"✅ Verified {sum(v == 'OK' for v in verdicts.values())} of {len(verdicts)} ad set(s) with matching targeting")
+        return verdicts
@@ -0,0 +1,180 @@
+import json
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Graph error codes that mean "rate limited, nothing was executed" and are safe to send again
+THROTTLE_ERROR_CODES = {4, 17, 32, 613, 80000, 80001, 80002, 80003, 80004, 80005, 80006, 80008, 80009, 80014}
+
+# X-Business-Use-Case-Usage reports per use case; requests are mapped to one by their path
+USE_CASE_PATHS = [
+    ("ads_insights", re.compile(r"/insights\b")),
+    ("custom_audience", re.compile(r"/(customaudiences|saved_audiences)\b")),
+    ("leadgen", re.compile(r"/(leadgen_forms|leads)\b")),
+    ("pages", re.compile(r"/\d+/(feed|posts|photos)\b")),
+]
+ACCOUNT_RE = re.compile(r"/(act_\d+)")
+
+
+def _usage_pct(usage):
+    return max((v for k, v in usage.items() if k in ("call_count", "total_cputime", "total_time", "acc_id_util_pct")
+                and isinstance(v, (int, float))), default=0)
+
+
+class GraphThrottle:
+    """
+    Paces Graph calls from the rate-limit headers Meta sends back on every response.
+
+    Usage is tracked per app (X-App-Usage), per ad account (X-Ad-Account-Usage) and per
+    business use case (X-Business-Use-Case-Usage). Below `soft_pct` calls go out unthrottled;
+    between `soft_pct` and `hard_pct` each call waits a delay that grows with the usage; at
+    `hard_pct`, or when Meta reports estimated_time_to_regain_access / reset_time_duration,
+    calls to that account or use case wait until access is back. Rate-limit errors
+    (17, 613, 80000-80014, ...) are retried after the same wait, up to `retries` times.
+
+    Mounted on the SDK's requests session with install(), or used for raw requests through
+    session(), so both paths share the same view of the limits.
+    """
+
+    def __init__(self, soft_pct=75, hard_pct=95, max_delay=10, error_backoff=60, retries=3, usage_ttl=60):
+        self.soft_pct = soft_pct
+        self.hard_pct = hard_pct
+        self.max_delay = max_delay
+        self.error_backoff = error_backoff
+        self.retries = retries
+        self.usage_ttl = usage_ttl
+        self._lock = threading.Lock()
+        self._usage = {}  # bucket -> (last reported usage %, when)
+        self._blocked_until = {}  # bucket -> epoch seconds
+
+    def buckets(self, url):
+        path = requests.utils.urlparse(url).path
+        found = [("app",)]
+        account = ACCOUNT_RE.search(path)
+        if account:
+            found.append(("account", account.group(1)))
+        use_case = next((name for name, pattern in USE_CASE_PATHS if pattern.search(path)), "ads_management")
+        found.append(("use_case", use_case))
+        return found
+
+    def delay(self, url):
+        """Seconds to wait before sending a request to `url`."""
+        now = time.time()
+        wait = 0.0
+        with self._lock:
+            for bucket in self.buckets(url):
+                wait = max(wait, self._blocked_until.get(bucket, 0) - now)
+                pct, seen_at = self._usage.get(bucket, (0, 0))
+                if now - seen_at > self.usage_ttl:
+                    # Meta's usage windows roll; a reading this old no longer says anything
+                    continue
+                if pct >= self.hard_pct:
+                    wait = max(wait, self.max_delay)
+                elif pct > self.soft_pct:
+                    wait = max(wait, self.max_delay * ((pct - self.soft_pct) / (self.hard_pct - self.soft_pct)) ** 2)
+        return max(wait, 0.0)
+
+    def wait(self, url):
+        seconds = self.delay(url)
+        if seconds >= 1:
+            print(f"⏳ Throttling {seconds:.1f}s to stay under Meta rate limits…")
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def observe(self, url, response):
+        """Record the usage headers of one response; returns True if it was a rate-limit error."""
+        now = time.time()
+        headers = response.headers
+        app = self._header(headers, "X-App-Usage")
+        account_usage = self._header(headers, "X-Ad-Account-Usage")
+        business = self._header(headers, "X-Business-Use-Case-Usage")
+        account = ACCOUNT_RE.search(requests.utils.urlparse(url).path)
+
+        with self._lock:
+            if app:
+                self._usage[("app",)] = (_usage_pct(app), now)
+            if account_usage and account:
+                bucket = ("account", account.group(1))
+                self._usage[bucket] = (_usage_pct(account_usage), now)
+                reset = account_usage.get("reset_time_duration") or 0
+                if self._usage[bucket][0] >= 100 and reset:
+                    self._block(bucket, now + reset)
+            for entries in (business or {}).values():
+                for entry in entries:
+                    bucket = ("use_case", entry.get("type", "ads_management"))
+                    self._usage[bucket] = (_usage_pct(entry), now)
+                    regain = entry.get("estimated_time_to_regain_access") or 0
+                    if regain:
+                        # Meta reports this one in minutes
+                        self._block(bucket, now + regain * 60)
+
+            throttled = self._is_throttle_error(response)
+            if throttled and not any(self._blocked_until.get(b, 0) > now for b in self.buckets(url)):
+                for bucket in self.buckets(url)[1:]:
+                    self._block(bucket, now + self.error_backoff)
+        return throttled
+
+    def _block(self, bucket, until):
+        if until > self._blocked_until.get(bucket, 0):
+            self._blocked_until[bucket] = until
+            print(f"🚦 Meta rate limit reached for {'/'.join(bucket)}; pausing it for {until - time.time():.0f}s")
+
+    @staticmethod
+    def _header(headers, name):
+        value = headers.get(name)
+        if not value:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _is_throttle_error(response):
+        if response.status_code < 400:
+            return False
+        try:
+            error = response.json().get("error") or {}
+        except ValueError:
+            return False
+        return error.get("code") in THROTTLE_ERROR_CODES
+
+    def adapter(self):
+        return ThrottledAdapter(self)
+
+    def install(self, api=None):
+        """Route every call the Facebook SDK makes (graph and graph-video) through this throttle."""
+        from facebook_business.api import FacebookAdsApi
+        api = api or FacebookAdsApi.get_default_api()
+        api._session.requests.mount("https://", self.adapter())
+        return api
+
+    def session(self):
+        """A requests.Session for raw Graph calls, paced by this throttle."""
+        session = requests.Session()
+        session.mount("https://", self.adapter())
+        return session
+
+
+class ThrottledAdapter(HTTPAdapter):
+    def __init__(self, throttle, **kwargs):
+        self.throttle = throttle
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        # A streamed body (see media_upload.MultipartFileStream) is consumed by the first send
+        retries = self.throttle.retries if not hasattr(request.body, "read") else 0
+        for attempt in range(retries + 1):
+            self.throttle.wait(request.url)
+            response = super().send(request, **kwargs)
+            if not self.throttle.observe(request.url, response) or attempt == retries:
+                return response
+            print(f"⚠️ Rate limited by Meta, retrying ({attempt + 1}/{retries})")
+        return response
+
+
+# One throttle per process, so every script/session sees the same limits
+default_throttle = GraphThrottle()
@@ -1,18 +1,32 @@
 import os
-import time
-import base64
 import json
+import argparse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, Future
 from dotenv import load_dotenv
 from facebook_business.api import FacebookAdsApi
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.campaign import Campaign
-from facebook_business.adobjects.reachfrequencyprediction import ReachFrequencyPrediction
 from facebook_business.adobjects.adset import AdSet
-from facebook_business.adobjects.advideo import AdVideo
-# Removed SavedAudience import - we'll use account.get_saved_audiences instead
+from facebook_business.exceptions import FacebookRequestError
 from config import Config_Data
 import pandas as pd
 from date_time_stripper import Stripper
+from prediction_poller import PredictionPoller, PredictionFailed
+from throttle import default_throttle
+from media_cache import MediaCache
+from media_upload import upload_image_file, ChunkedVideoUploader
+from media_stage import MediaStage
+from result_store import ResultStore
+from plan import compile_plan, is_blank
+from run_journal import RunJournal
+from prediction_cache import PredictionCache
+from rf_sweep import RFSweep, SweepPoller
+from preflight import AudienceEstimator, spec_digest
+from targeting_verify import TargetingVerifier
+from deadline_executor import DeadlineExecutor
+from saved_audience import SavedAudienceCache
+from batch_transport import BatchTransport, DependentBatch, MAX_BATCH_SIZE, result_ref
 from datetime import datetime
 
 # Load credentials from .env
@@ -30,10 +44,57 @@ if ad_account_id and not ad_account_id.startswith("act_"):
 if page_id and page_id.startswith("pg_"):
     page_id = page_id.replace("pg_", "")
 
+# Command line options
+parser = argparse.ArgumentParser(description="Create R&F campaigns, adsets and ads from MedullaPOCFILE.csv")
+parser.add_argument("--workers", type=int, default=int(os.getenv("RF_WORKERS", "1")),
+                    help="Number of adsets run concurrently (predict, poll, reserve, adset, ads). 1 = sequential")
+parser.add_argument("--verify-media-cache", action="store_true",
+                    help="Drop cached image hashes / video IDs that Meta no longer recognises before the run")
+parser.add_argument("--mode", choices=["pipeline", "two-phase"], default=os.getenv("RF_MODE", "pipeline"),
+                    help="pipeline: each adset runs predict -> reserve -> adset on its own. "
+                         "two-phase: submit every prediction first, then reserve adsets in the order their predictions complete")
+parser.add_argument("--no-batch", action="store_true",
+                    help="Send every campaign / creative / ad create as its own request instead of Graph batch requests")
+parser.add_argument("--sweep", action="store_true",
+                    help="Predict every variant in Config_Data.rf_sweep_grid for each adset and reserve the best by Config_Data.rf_sweep_objective")
+parser.add_argument("--preflight", action="store_true",
+                    help="Reject R&F adsets whose audience estimate is below Config_Data.rf_min_audience_size before submitting any prediction")
+parser.add_argument("--validate", action="store_true",
+                    help="Dry run: check every campaign / adset / creative / ad payload with Meta's validate_only, write validation_report.csv and exit")
+parser.add_argument("--resume", action="store_true",
+                    help="Reuse the campaigns, predictions, reservations, adsets, creatives and ads an interrupted run of the same sheet already created")
+args = parser.parse_args()
+
 # Initialize the Facebook API
 FacebookAdsApi.init(app_id, app_secret, access_token)
+# Pace every SDK call from Meta's rate-limit headers instead of fixed sleeps
+default_throttle.install()
 account = AdAccount(ad_account_id)
 
+# One shared poller checks every outstanding prediction in a single Graph request per tick
+prediction_poller = SweepPoller() if args.sweep else PredictionPoller()
+# Finished but unreserved predictions, keyed by their parameters, so a rerun reserves them instead of recomputing
+prediction_cache = PredictionCache()
+# prediction_id -> expiration_time; reserving it and creating its adset are scheduled against this deadline
+prediction_expiry = {}
+# Prediction variants tried per adset with --sweep; the losers are never reserved and expire on their own
+rf_sweep = RFSweep(account, prediction_poller, Config_Data.rf_sweep_grid, Config_Data.rf_sweep_objective,
+                   Config_Data.rf_sweep_min_frequency) if args.sweep else None
+
+# Image hashes / video IDs keyed by account + file SHA-256, shared across runs
+media_cache = MediaCache()
+video_uploader = ChunkedVideoUploader(ad_account_id, parallel=int(os.getenv("VIDEO_UPLOAD_PARALLEL", "4")))
+# Videos are uploaded up front and released to their ads one by one as Meta finishes encoding them
+media_stage = MediaStage(ad_account_id, media_cache, video_uploader)
+if args.verify_media_cache:
+    media_cache.verify(account)
+
+# Created adsets' targeting is checked against what was sent in one multi-ID GET per 50 at the end of the run
+targeting_verifier = TargetingVerifier()
+
+# Independent creates (campaigns, creatives, ads) are queued and sent as batch requests of up to 50
+batch_transport = None if args.no_batch else BatchTransport()
+
 # Get the saved audience ID for logging purposes and to derive exclusions
 saved_audience_id = "120230031807900477"
 
@@ -41,7 +102,9 @@ saved_audience_id = "120230031807900477"
 print(f"🎯 Saved Audience ID (for reference): {saved_audience_id}")
 sa_targeting = {}
 try:
-    sa = next((s for s in account.get_saved_audiences(fields=['id','name','targeting'], params={'limit': 500}) if str(s.get('id')) == str(saved_audience_id)), None)
+    # Fetched by ID rather than paging through every saved audience; the targeting is cached in
+    # .meta_cache and only downloaded again when the audience's time_updated changes
+    sa = SavedAudienceCache().get(saved_audience_id)
     if sa:
         print(f"🎯 Saved Audience Name: {sa.get('name')} ({saved_audience_id})")
         sa_targeting = sa.get('targeting') or {}
@@ -133,32 +196,33 @@ if saved_included_geo:
 
 ###################################################### HELPER METHODS ###############################################
 
-# Function to upload image and return hash
+# Create one object under the ad account and return its ID; goes through the batch transport unless --no-batch
+def create_object(create, edge, params):
+    if batch_transport is None:
+        return create(fields=[], params=params).get("id")
+    return batch_transport.call("POST", (ad_account_id, edge), params, label=params.get("name")).get("id")
+
+# Function to upload image and return hash (cached by file contents, see media_cache.py)
 def get_image_hash(image_path):
+    return media_cache.get_or_upload(ad_account_id, "image", image_path, _upload_image)
+
+def _upload_image(image_path):
     print("🖼️  Uploading image and generating hash...")
     print("⏳ Please wait...")
-    with open(image_path, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode("utf-8")
-        image = account.create_ad_image(fields=[], params={"bytes": encoded})
-    image_hash = image.get("hash")
+    # Streamed from disk as multipart - no base64 copy of the whole file in memory
+    image_hash = upload_image_file(ad_account_id, image_path)
     print(f"✅ Image uploaded successfully. Hash: {image_hash}")
     return image_hash
 
-# Function to upload video and return video ID
+# Function to return the video ID once the video is uploaded and encoded (see media_stage.py)
 def get_video_id(video_path):
-    print("🎬 Uploading video and generating ID...")
-    print("⏳ Please wait, this may take a few moments...")
-    video = AdVideo(parent_id=ad_account_id)
-    video[AdVideo.Field.filepath] = video_path
-    video.remote_create()
-    print("🔄 Video is being processed and encoded...")
-    video.waitUntilEncodingReady()
-    vid_id = video.get_id()
-    print(f"✅ Video uploaded successfully. ID: {vid_id}")
+    print("🎬 Waiting for video upload and encoding...")
+    vid_id = media_stage.video_id(video_path)
+    print(f"✅ Video ready. ID: {vid_id}")
     return vid_id
 
-# Function to create ad creative (image or video)
-def create_ad_creative(creative_type, media_path, ad_name, headline, description, message, link, call_to_action):
+# Creative params for an image or video ad; waits for the media to be uploaded unless its hash / ID is given
+def build_creative_params(creative_type, media_path, ad_name, headline, description, message, link, call_to_action, image_hash=None, video_id=None):
     creative_params = {
         "name": ad_name,
         "object_story_spec": {
@@ -167,7 +231,7 @@ def create_ad_creative(creative_type, media_path, ad_name, headline, description
     }
     if creative_type.lower() == "image":
         # Create image creative
-        image_hash = get_image_hash(media_path)
+        image_hash = image_hash or get_image_hash(media_path)
         creative_params["object_story_spec"]["link_data"] = {
             "image_hash": image_hash,
             "link": link,
@@ -181,7 +245,7 @@ def create_ad_creative(creative_type, media_path, ad_name, headline, description
         }
     elif creative_type.lower() == "video":
         # Create video creative
-        video_id = get_video_id(media_path)
+        video_id = video_id or get_video_id(media_path)
         # Optionally, upload an image for thumbnail if needed
         thumbnail_hash = get_image_hash(r"sampleimage.png")
         creative_params["object_story_spec"]["video_data"] = {
@@ -197,405 +261,981 @@ def create_ad_creative(creative_type, media_path, ad_name, headline, description
         }
     else:
         raise ValueError("Invalid creative_type. Must be 'image' or 'video'.")
+    return creative_params
 
+# Function to create ad creative (image or video)
+def create_ad_creative(creative_type, media_path, ad_name, headline, description, message, link, call_to_action):
+    creative_params = build_creative_params(creative_type, media_path, ad_name, headline, description, message, link, call_to_action)
     print("🎨 Creating ad creative...")
     print("⏳ Please wait while we set up your creative...")
-    creative = account.create_ad_creative(fields=[], params=creative_params)
-    creative_id = creative.get("id")
+    creative_id = create_object(account.create_ad_creative, "adcreatives", creative_params)
     print(f"✅ Creative Created Successfully: {creative_id}")
     return creative_id
 
-# Function to create an ad in specified ad set
-def create_ad(adset_id, creative_id, ad_name, ad_status="ACTIVE"):
-    ad_params = {
+def build_ad_params(adset_id, creative_id, ad_name, ad_status="ACTIVE"):
+    return {
         "name": ad_name,
         "adset_id": adset_id,
         "creative": {"creative_id": creative_id},
         "status": ad_status.upper()
     }
+
+# Function to create an ad in specified ad set
+def create_ad(adset_id, creative_id, ad_name, ad_status="ACTIVE"):
+    ad_params = build_ad_params(adset_id, creative_id, ad_name, ad_status)
     print("📢 Creating ad...")
     print("⏳ Please wait while we create your ad...")
-    ad = account.create_ad(fields=[], params=ad_params)
-    ad_id = ad.get("id")
+    ad_id = create_object(account.create_ad, "ads", ad_params)
     print(f"✅ Ad Created Successfully: {ad_id}")
     return ad_id
 
+# Media used by every ad in the plan
+IMAGE_PATH = r"sampleimage.png"
+VIDEO_PATH = r"sampleVideo.mp4"
+
 # Filtering campaign columns
 camp_cols = Config_Data.campaign_columns
 
 # READ THE INPUT FILE - AND CREATE A DATAFRAME
-df = pd.read_csv("MedullaPOCFILE.csv")
-final_df = df.copy()
-
-# Initialize result columns to avoid pandas SettingWithCopy warnings
-final_df['campaign_logs'] = ''
-final_df['campaign_id'] = ''
-final_df['adset_logs'] = ''
-final_df['adset_id'] = ''
-final_df['prediction_id'] = ''
-final_df['ad_logs'] = ''
-final_df['ad_id'] = ''
+INPUT_PATH = "MedullaPOCFILE.csv"
+df = pd.read_csv(INPUT_PATH)
 
-####################################### COMPLETE CAMPAIGN FLOW #####################################
-camp_df = df[camp_cols].drop_duplicates()
+# Results are written into a store indexed by campaign / adset / ad once, instead of a boolean-mask
+# scan over final_df per write; it is materialised into finaloutput.csv at the end of the run.
+# The store is thread-safe, so the adset and ad workers write to it directly.
+results = ResultStore(df, columns=['campaign_logs', 'campaign_id', 'adset_logs', 'adset_id', 'prediction_id', 'ad_logs', 'ad_id'])
 
-# Check if there are any valid campaigns to process
-if camp_df.empty:
-    print("No campaigns detected in the data.")
-    exit()
+# Campaign -> Adset -> Ad tree built in one pass over the sheet; every stage below walks this
+# instead of re-filtering df with drop_duplicates()/iterrows() per campaign and per adset.
+# bid_amount is optional in the sheet and only read for auction adsets with a capped bid_strategy
+plan = compile_plan(
+    df if 'bid_amount' in df.columns else df.assign(bid_amount=float('nan')),
+    camp_cols, [*Config_Data.adset_columns, 'bid_amount'], Config_Data.ad_columns,
+)
 
-for camp_idx, camp_row in camp_df.iterrows():
-    # Skip empty or invalid campaign rows
-    if camp_row.isnull().all():
-        print("No further campaigns detected.")
-        break
-    if pd.isna(camp_row['campaign_name']) or pd.isna(camp_row['objective']) or pd.isna(camp_row['buy_type']):
-        print("\n🔹 No further campaigns detected.")
-        break
-    
-    print(f"\n{'='*60}")
-    print(f"Processing Campaign: {camp_row['campaign_name']}")
-    print(f"{'='*60}")
-    
-    # Step 1: Create Campaign
-    print("\n🔹 Creating Campaign...")
-    cname = camp_row['campaign_name']
-    campaign_params = {
-        Campaign.Field.name: cname,
-        Campaign.Field.objective: camp_row['objective'],
-        Campaign.Field.status: "PAUSED",
-        Campaign.Field.buying_type: camp_row['buy_type'],
-        Campaign.Field.special_ad_categories: ["NONE"]
-    }
-    
-    try:
-        campaign = account.create_campaign(fields=[], params=campaign_params)
-        campaign_id = campaign.get("id")
-        camp_logs = 'NO ERROR'
-        print(f"✅ Campaign Created: {campaign_id}")
-    except Exception as e:
-        campaign_id = ''
-        camp_logs = e
-        print(f"❌ Campaign Creation Failed: {e}")
-        continue  # Skip to next campaign if this one fails
+# Every ID is journaled (fsync'd) the moment Meta returns it; --resume skips whatever is already there
+# (--validate creates nothing, so it opens the journal in resume mode rather than setting an interrupted run aside)
+journal = RunJournal(INPUT_PATH, resume=args.resume or args.validate)
 
-    final_df.loc[(final_df['campaign_name'] == cname), 'campaign_logs'] = camp_logs
-    final_df.loc[(final_df['campaign_name'] == cname), 'campaign_id'] = campaign_id
-    
-    # Step 2: Process all adsets for this campaign
-    adset_cols = Config_Data.adset_columns
-    campaign_adsets = final_df[(final_df['campaign_name'] == cname)][adset_cols].drop_duplicates()
-    
-    for adset_idx, adset_row in campaign_adsets.iterrows():
-        print(f"\n--- Processing Adset: {adset_row['adset_name']} ---")
-        
-        # Update the adset row with the campaign_id
-        adset_row['campaign_id'] = campaign_id
+####################################### TARGETING #####################################
 
-        ############################# Create Reach & Frequency Prediction #################################
+def parse_adset_dates(adset_row):
+    # Use Stripper class for date handling
+    try:
+        start_time_str, stop_time_str = Stripper(adset_row['start_date'], adset_row['end_date']).get_formatted_dates()
+        if start_time_str is None or stop_time_str is None:
+            print(f"Skipping row with invalid dates: start_date={adset_row['start_date']}, end_date={adset_row['end_date']}")
+            return None, None
 
-        print("\n🔹 Creating Reach & Frequency Prediction...")
-        
-        # Use Stripper class for date handling
+        # Handle datetime strings with or without timezone info
         try:
-            start_time_str, stop_time_str = Stripper(adset_row['start_date'], adset_row['end_date']).get_formatted_dates()
-            if start_time_str is None or stop_time_str is None:
-                print(f"Skipping row with invalid dates: start_date={adset_row['start_date']}, end_date={adset_row['end_date']}")
-                continue
-                
-            # Handle datetime strings with or without timezone info
-            try:
-                start_dt = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M:%S%z")
-                stop_dt = datetime.strptime(stop_time_str, "%Y-%m-%dT%H:%M:%S%z")
-            except ValueError:
-                start_dt = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M:%S")
-                stop_dt = datetime.strptime(stop_time_str, "%Y-%m-%dT%H:%M:%S")
-        except (ValueError, TypeError) as e:
-            print(f"Date parsing error: {e}")
-            continue
+            start_dt = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M:%S%z")
+            stop_dt = datetime.strptime(stop_time_str, "%Y-%m-%dT%H:%M:%S%z")
+        except ValueError:
+            start_dt = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M:%S")
+            stop_dt = datetime.strptime(stop_time_str, "%Y-%m-%dT%H:%M:%S")
+    except (ValueError, TypeError) as e:
+        print(f"Date parsing error: {e}")
+        return None, None
+    return start_dt, stop_dt
 
-        # Build exclusions for geo using: included geo (as negatives) + explicit excluded geo from Saved Audience
-        combined_excluded_geo = None
-        if saved_included_geo or saved_excluded_geo:
-            # Only exclude regions and cities to avoid excluding entire country 'IN'
-            combined_excluded_geo = {"regions": [], "cities": []}
-            if isinstance(saved_excluded_geo, dict):
-                combined_excluded_geo["regions"].extend(saved_excluded_geo.get("regions", []) or [])
-                combined_excluded_geo["cities"].extend(saved_excluded_geo.get("cities", []) or [])
-            if isinstance(saved_included_geo, dict):
-                # Treat included regions/cities from Saved Audience as exclusions for our ad set
-                combined_excluded_geo["regions"].extend(saved_included_geo.get("regions", []) or [])
-                combined_excluded_geo["cities"].extend(saved_included_geo.get("cities", []) or [])
-            # Deduplicate regions/cities (dicts)
-            def _dedupe_places(items):
-                seen = set()
-                result = []
-                for it in items:
-                    if not isinstance(it, dict):
-                        continue
-                    key = (str(it.get("name", "")).lower(), str(it.get("country", "")).upper())
-                    if key not in seen:
-                        seen.add(key)
-                        result.append({k: v for k, v in it.items() if v is not None})
-                return result
-            combined_excluded_geo["regions"] = _dedupe_places(combined_excluded_geo["regions"])
-            combined_excluded_geo["cities"] = _dedupe_places(combined_excluded_geo["cities"])
-            print(f"🧭 Excluded locations (Saved Audience derived) → regions: {len(combined_excluded_geo['regions'])}, cities: {len(combined_excluded_geo['cities'])}")
-
-        prediction_params = {
-            "campaign_id": adset_row['campaign_id'],
-            "objective": adset_row['objective'],
-            "optimization_goal": "REACH",
-            "start_time": int(start_dt.timestamp()),
-            "end_time": int(stop_dt.timestamp()),
-            "budget": int(adset_row['adset_budget_amount']),
-            "buying_type": adset_row['buy_type'],
-            "frequency_cap": int(adset_row['frequency_cap']),
-            "interval_frequency_cap_reset_period": 96,  # 96 hours = 4 days
-            "prediction_mode": int(adset_row['prediction_mode']),
-            "destination_id": adset_row['fbpage'].replace("pg_", "") if adset_row['fbpage'] and adset_row['fbpage'].startswith("pg_") else adset_row['fbpage'],
-            "story_event_type": 128,
-            "creative_spec": {"page_id": adset_row['fbpage'].replace("pg_", "") if adset_row['fbpage'] and adset_row['fbpage'].startswith("pg_") else adset_row['fbpage']},
-            "target_spec": {
-                "age_max": int(adset_row['age_max']),
-                "age_min": int(adset_row['age_min']),
-                "flexible_spec": [
-                    {
-                        "interests": [
-                            {"id": "6003348604581"}, {"id": "6003396051089"}, {"id": "6003384248805"},
-                            {"id": "6003277229371"}, {"id": "6003985771306"}, {"id": "6003164535634"},
-                            {"id": "6004160395895"}, {"id": "6003211401886"}, {"id": "6003266061909"},
-                            {"id": "6009248606271"}, {"id": "6003020834693"}, {"id": "6003029869785"},
-                            {"id": "6003139266461"}, {"id": "6003161475030"}, {"id": "6003263791114"},
-                            {"id": "6003346592981"}, {"id": "6003327060545"}, {"id": "6003270811593"},
-                            {"id": "6003402305839"}, {"id": "6003248297213"}, {"id": "6003130044117"},
-                            {"id": "6003143720966"}, {"id": "6003269553527"}, {"id": "6003540150873"},
-                            {"id": "6003258544357"}, {"id": "6003382102565"}, {"id": "6002867432822"},
-                            {"id": "6003088846792"}, {"id": "6003279598823"}, {"id": "6003403706343"},
-                            {"id": "6003304550260"}, {"id": "6003641420907"}, {"id": "6003109198633"},
-                            {"id": "6003057392644"}, {"id": "6004922412789"}, {"id": "6003306084421"},
-                            {"id": "6004920030448"}, {"id": "6003649983713"}, {"id": "6002920953955"},
-                            {"id": "6003502352425"}, {"id": "6003392552125"}, {"id": "6002989694968"},
-                            {"id": "6003594228273"}
-                        ]
-                    },
-                    {
-                        "interests": [
-                            {"id": "6003456388203"}, {"id": "6003418314031"}, {"id": "6003526234370"},
-                            {"id": "6003188355978"}, {"id": "6003372784175"}
-                        ]
-                    }
-                ],
-                # Apply exclusions derived from Saved Audience targeting (not using excluded_custom_audiences)
-                **({"exclusions": saved_exclusions} if saved_exclusions else {}),
-                **({"excluded_geo_locations": combined_excluded_geo} if combined_excluded_geo else {}),
-                "geo_locations": {
-                    "countries": ["IN"],
-                    "location_types": ["home", "recent"]
-                },
-                "brand_safety_content_filter_levels": ["FACEBOOK_RELAXED"],
-                "publisher_platforms": eval(adset_row['publisher_platforms']) if adset_row.get('publisher_platforms') else ["facebook"],
-                "facebook_positions": eval(adset_row['facebook_positions']) if adset_row.get('facebook_positions') else ["feed"],
-                "device_platforms": ["mobile", "desktop"] if adset_row["device"].strip().upper() == "ALL" else [adset_row["device"].strip().lower()],
-                "audience_network_positions": ["classic"]
+def build_excluded_geo():
+    # Build exclusions for geo using: included geo (as negatives) + explicit excluded geo from Saved Audience
+    combined_excluded_geo = None
+    if saved_included_geo or saved_excluded_geo:
+        # Only exclude regions and cities to avoid excluding entire country 'IN'
+        combined_excluded_geo = {"regions": [], "cities": []}
+        if isinstance(saved_excluded_geo, dict):
+            combined_excluded_geo["regions"].extend(saved_excluded_geo.get("regions", []) or [])
+            combined_excluded_geo["cities"].extend(saved_excluded_geo.get("cities", []) or [])
+        if isinstance(saved_included_geo, dict):
+            # Treat included regions/cities from Saved Audience as exclusions for our ad set
+            combined_excluded_geo["regions"].extend(saved_included_geo.get("regions", []) or [])
+            combined_excluded_geo["cities"].extend(saved_included_geo.get("cities", []) or [])
+        # Deduplicate regions/cities (dicts)
+        def _dedupe_places(items):
+            seen = set()
+            result = []
+            for it in items:
+                if not isinstance(it, dict):
+                    continue
+                key = (str(it.get("name", "")).lower(), str(it.get("country", "")).upper())
+                if key not in seen:
+                    seen.add(key)
+                    result.append({k: v for k, v in it.items() if v is not None})
+            return result
+        combined_excluded_geo["regions"] = _dedupe_places(combined_excluded_geo["regions"])
+        combined_excluded_geo["cities"] = _dedupe_places(combined_excluded_geo["cities"])
+        print(f"🧭 Excluded locations (Saved Audience derived) → regions: {len(combined_excluded_geo['regions'])}, cities: {len(combined_excluded_geo['cities'])}")
+    return combined_excluded_geo
+
+def build_target_spec(adset_row, excluded_geo):
+    return {
+        "age_max": int(adset_row['age_max']),
+        "age_min": int(adset_row['age_min']),
+        "flexible_spec": [
+            {
+                "interests": [
+                    {"id": "6003348604581"}, {"id": "6003396051089"}, {"id": "6003384248805"},
+                    {"id": "6003277229371"}, {"id": "6003985771306"}, {"id": "6003164535634"},
+                    {"id": "6004160395895"}, {"id": "6003211401886"}, {"id": "6003266061909"},
+                    {"id": "6009248606271"}, {"id": "6003020834693"}, {"id": "6003029869785"},
+                    {"id": "6003139266461"}, {"id": "6003161475030"}, {"id": "6003263791114"},
+                    {"id": "6003346592981"}, {"id": "6003327060545"}, {"id": "6003270811593"},
+                    {"id": "6003402305839"}, {"id": "6003248297213"}, {"id": "6003130044117"},
+                    {"id": "6003143720966"}, {"id": "6003269553527"}, {"id": "6003540150873"},
+                    {"id": "6003258544357"}, {"id": "6003382102565"}, {"id": "6002867432822"},
+                    {"id": "6003088846792"}, {"id": "6003279598823"}, {"id": "6003403706343"},
+                    {"id": "6003304550260"}, {"id": "6003641420907"}, {"id": "6003109198633"},
+                    {"id": "6003057392644"}, {"id": "6004922412789"}, {"id": "6003306084421"},
+                    {"id": "6004920030448"}, {"id": "6003649983713"}, {"id": "6002920953955"},
+                    {"id": "6003502352425"}, {"id": "6003392552125"}, {"id": "6002989694968"},
+                    {"id": "6003594228273"}
+                ]
+            },
+            {
+                "interests": [
+                    {"id": "6003456388203"}, {"id": "6003418314031"}, {"id": "6003526234370"},
+                    {"id": "6003188355978"}, {"id": "6003372784175"}
+                ]
             }
-        }
+        ],
+        # Apply exclusions derived from Saved Audience targeting (not using excluded_custom_audiences)
+        **({"exclusions": saved_exclusions} if saved_exclusions else {}),
+        **({"excluded_geo_locations": excluded_geo} if excluded_geo else {}),
+        "geo_locations": {
+            "countries": ["IN"],
+            "location_types": ["home", "recent"]
+        },
+        "brand_safety_content_filter_levels": ["FACEBOOK_RELAXED"],
+        "publisher_platforms": eval(adset_row['publisher_platforms']) if adset_row.get('publisher_platforms') else ["facebook"],
+        "facebook_positions": eval(adset_row['facebook_positions']) if adset_row.get('facebook_positions') else ["feed"],
+        "device_platforms": ["mobile", "desktop"] if adset_row["device"].strip().upper() == "ALL" else [adset_row["device"].strip().lower()],
+        "audience_network_positions": ["classic"]
+    }
+
+# Targeting fields R&F ad sets accept but do not store; left out of the targeting verification
+RF_DROPPED_TARGETING = ['exclusions']
+
+# Ad set targeting mirrors the prediction / target spec, with the Saved Audience exclusions re-applied
+def build_adset_targeting(target_spec, excluded_geo):
+    adset_targeting = target_spec.copy()
+    adset_targeting.pop('exclusions', None)
+    # Re-apply exclusions derived from Saved Audience for prediction-only fields
+    if saved_exclusions:
+        # Note: R&F ad sets ignore detailed targeting exclusions at creation time
+        adset_targeting['exclusions'] = saved_exclusions
+    if excluded_geo:
+        # For ad set, place excluded geo under geo_locations for UI to display
+        geo = adset_targeting.get('geo_locations') or {}
+        geo['excluded_geo_locations'] = excluded_geo
+        adset_targeting['geo_locations'] = geo
+    return adset_targeting
+
+####################################### ADSET PIPELINE #####################################
+
+# An adset whose prediction has been submitted; what the reserve -> adset -> ads steps need
+PendingAdset = namedtuple("PendingAdset", ["cname", "adset_spec", "adset_row", "done", "prediction_params", "excluded_geo", "prediction_id", "cached", "ready"])
+
+# Runs the whole predict -> poll -> reserve -> adset -> ads chain for one adset.
+# Adsets are independent of each other, so several of these can run at once (see --workers).
+def process_adset(cname, campaign_id, adset_spec):
+    pending = submit_prediction(cname, campaign_id, adset_spec)
+    if pending:
+        status = wait_for_prediction(pending)
+        work_queue.submit(finish_adset, pending, status, deadline=adset_deadline(pending)).result()
+
+# Builds and submits the R&F prediction for one adset, or reuses a journaled / cached one unless reuse=False
+def submit_prediction(cname, campaign_id, adset_spec, reuse=True):
+    adset_row = dict(adset_spec.data)
+    done = journal.get("adset", cname, adset_spec.name)
+    print(f"\n--- Processing Adset: {adset_row['adset_name']} ---")
+    
+    # Update the adset row with the campaign_id
+    adset_row['campaign_id'] = campaign_id
+
+    ############################# Create Reach & Frequency Prediction #################################
+
+    print("\n🔹 Creating Reach & Frequency Prediction...")
     
-        prediction_id = None
+    start_dt, stop_dt = parse_adset_dates(adset_row)
+    if start_dt is None:
+        return
+
+    combined_excluded_geo = build_excluded_geo()
+
+    prediction_params = {
+        "campaign_id": adset_row['campaign_id'],
+        "objective": adset_row['objective'],
+        "optimization_goal": "REACH",
+        "start_time": int(start_dt.timestamp()),
+        "end_time": int(stop_dt.timestamp()),
+        "budget": int(adset_row['adset_budget_amount']),
+        "buying_type": adset_row['buy_type'],
+        "frequency_cap": int(adset_row['frequency_cap']),
+        "interval_frequency_cap_reset_period": 96,  # 96 hours = 4 days
+        "prediction_mode": int(adset_row['prediction_mode']),
+        "destination_id": adset_row['fbpage'].replace("pg_", "") if adset_row['fbpage'] and adset_row['fbpage'].startswith("pg_") else adset_row['fbpage'],
+        "story_event_type": 128,
+        "creative_spec": {"page_id": adset_row['fbpage'].replace("pg_", "") if adset_row['fbpage'] and adset_row['fbpage'].startswith("pg_") else adset_row['fbpage']},
+        "target_spec": build_target_spec(adset_row, combined_excluded_geo)
+    }
+
+    prediction_id = done.get("prediction_id") if reuse else None
+    cached = ready = False
+    # Swept predictions differ from the sheet's parameters, so they are never cached under them
+    if not prediction_id and reuse and not rf_sweep:
+        prediction_id, expires_at = prediction_cache.take(ad_account_id, prediction_params)
+        cached = bool(prediction_id)
+        if cached:
+            prediction_expiry[prediction_id] = expires_at
+    if cached:
+        journal.record("adset", cname, adset_spec.name, rows=adset_spec.rows, prediction_id=prediction_id)
+        print(f"♻️ Reusing finished, unreserved prediction with the same parameters: {prediction_id}")
+    elif prediction_id:
+        prediction_params.update(done.get("sweep") or {})
+        print(f"↩️ Prediction already created in an earlier run: {prediction_id}")
+    elif rf_sweep:
+        ranked = rf_sweep.run(prediction_params, label=adset_row['adset_name'])
+        if ranked:
+            prediction_id, prediction_params, ready = ranked[0].prediction_id, ranked[0].params, True
+            prediction_expiry[prediction_id] = ranked[0].record.get("expiration_time")
+            swept = {k: prediction_params[k] for k in SWEPT_PARAMS}
+            journal.record("adset", cname, adset_spec.name, rows=adset_spec.rows, prediction_id=prediction_id, sweep=swept)
+            print(f"🏆 Best variant: {prediction_id} (budget {prediction_params['budget']}, frequency_cap {prediction_params['frequency_cap']})")
+        else:
+            print(f"❌ No sweep variant finished for adset {adset_row['adset_name']}")
+            prediction_id = False
+    else:
         try:
             prediction = account.create_reach_frequency_prediction(fields=[], params=prediction_params)
             prediction_id = prediction.get("id")
+            journal.record("adset", cname, adset_spec.name, rows=adset_spec.rows, prediction_id=prediction_id)
             print(f"✅ Prediction Created: {prediction_id}")
         except Exception as e:
             print(f"❌ Reach Creation Failed: {e}")
             print(f"Campaign ID: {adset_row['campaign_id']}, Adset: {adset_row['adset_name']}")
             prediction_id = False
 
-        if not prediction_id:
-            continue
+    if not prediction_id:
+        return None
+    return PendingAdset(cname, adset_spec, adset_row, done, prediction_params, combined_excluded_geo, prediction_id, cached, cached or ready)
 
-        # Step 3: Poll for Prediction Status
-        print("\n🔹 Checking Prediction Status...")
-        prediction_obj = ReachFrequencyPrediction(prediction_id)
-        status = None
-        for attempt in range(6):
-            prediction_obj = prediction_obj.api_get(fields=[ReachFrequencyPrediction.Field.status])
-            status = prediction_obj.get(ReachFrequencyPrediction.Field.status)
-            print(f"Attempt {attempt + 1}: Prediction Status = {status}")
-            
-            if status == 1:
-                print("✅ Prediction is SUCCESS and ready to reserve.")
-                break
-            elif status == 2:
-                time.sleep(10)
-                print("⏳ Prediction is still processing...")
+# Prediction parameters a sweep may change; journaled with the winner and written to the output
+SWEPT_PARAMS = ["budget", "frequency_cap", "interval_frequency_cap_reset_period", "prediction_mode"]
+
+# Reserve + adset create must happen before the prediction expires; None (unknown, e.g. resumed) queues it last
+def adset_deadline(pending):
+    return prediction_expiry.get(pending.prediction_id)
+
+# A cached, swept or already reserved prediction needs no polling
+def needs_polling(pending):
+    return not (pending.ready or pending.done.get("reserved_id"))
+
+def remember_prediction(pending, record):
+    prediction_expiry[pending.prediction_id] = record.get("expiration_time")
+    if rf_sweep:
+        return
+    prediction_cache.put(ad_account_id, pending.prediction_params, pending.prediction_id, record.get("expiration_time"),
+                         campaign_name=pending.cname)
+
+def wait_for_prediction(pending):
+    # Step 3: Poll for Prediction Status
+    print("\n🔹 Checking Prediction Status...")
+    try:
+        if needs_polling(pending):
+            remember_prediction(pending, prediction_poller.wait(pending.prediction_id))
+        status = 1
+        print("✅ Prediction is SUCCESS and ready to reserve.")
+    except PredictionFailed as e:
+        status = e.status
+        print(f"❌ Prediction Failed with status: {status} ({e})")
+    return status
+
+# Reserves a completed prediction, creates the adset and queues its ads
+def finish_adset(pending, status):
+    cname, adset_spec, adset_row, done, prediction_params, combined_excluded_geo, prediction_id, cached, _ = pending
+    campaign_id = adset_row['campaign_id']
+
+    # Step 5: Reserve the Prediction if successful
+    reserved_id = done.get("reserved_id")
+    if reserved_id:
+        print(f"↩️ Prediction already reserved in an earlier run: {reserved_id}")
+    elif status == 1:
+        print("\n🔹 Reserving Prediction...")
+        try:
+            reserve = account.create_reach_frequency_prediction(fields=[], params={
+                "action": "reserve",
+                "rf_prediction_id": prediction_id
+            })
+            reserved_id = reserve.get("id")
+            journal.record("adset", cname, adset_spec.name, rows=adset_spec.rows, reserved_id=reserved_id)
+            prediction_cache.discard(prediction_id)
+            if reserved_id:
+                print(f"✅ Reservation successful. Reserved Prediction ID: {reserved_id}")
             else:
-                print(f"❌ Prediction Failed with status: {status}")
-                break
+                print("❌ Reservation failed - no ID returned")
+                return
+        except Exception as e:
+            print(f"❌ Reservation failed: {e}")
+            if cached:
+                prediction_cache.discard(prediction_id)
+                print("🔁 Cached prediction could not be reserved; submitting a new prediction")
+                return retry_with_fresh_prediction(pending)
+            prediction_cache.release(prediction_id)
+            return
+    else:
+        print(f"❌ Cannot reserve prediction - status is {status}")
+        return
 
-        # Step 5: Reserve the Prediction if successful
-        if status == 1:
-            print("\n🔹 Reserving Prediction...")
-            try:
-                reserve = account.create_reach_frequency_prediction(fields=[], params={
-                    "action": "reserve",
-                    "rf_prediction_id": prediction_id
-                })
-                reserved_id = reserve.get("id")
-                if reserved_id:
-                    print(f"✅ Reservation successful. Reserved Prediction ID: {reserved_id}")
-                else:
-                    print("❌ Reservation failed - no ID returned")
-                    continue
-            except Exception as e:
-                print(f"❌ Reservation failed: {e}")
-                continue
-        else:
-            print(f"❌ Cannot reserve prediction - status is {status}")
-            continue
+    # Save the prediction ID
+    results.set_adset(cname, adset_row['adset_name'], prediction_id=prediction_id)
+    if rf_sweep:
+        # The reserved variant's budget / frequency cap, which may differ from the sheet's
+        results.set_adset(cname, adset_row['adset_name'], adset_budget_amount=prediction_params["budget"],
+                          frequency_cap=prediction_params["frequency_cap"], prediction_mode=prediction_params["prediction_mode"],
+                          interval_frequency_cap_reset_period=prediction_params["interval_frequency_cap_reset_period"])
 
-        # Save the prediction ID
-        final_df.loc[(final_df['campaign_id'] == adset_row['campaign_id']) & (final_df['adset_name'] == adset_row['adset_name']), 'prediction_id'] = prediction_id
-
-        # Prepare targeting for ad set creation; mirror prediction targeting
-        adset_targeting = prediction_params["target_spec"].copy()
-        adset_targeting.pop('exclusions', None)
-        # Re-apply exclusions derived from Saved Audience for prediction-only fields
-        if saved_exclusions:
-            # Note: R&F ad sets ignore detailed targeting exclusions at creation time
-            adset_targeting['exclusions'] = saved_exclusions
-        if combined_excluded_geo:
-            # For ad set, place excluded geo under geo_locations for UI to display
-            geo = adset_targeting.get('geo_locations') or {}
-            geo['excluded_geo_locations'] = combined_excluded_geo
-            adset_targeting['geo_locations'] = geo
-        
-        adset_params = {
-            AdSet.Field.name: adset_row['adset_name'],
-            AdSet.Field.campaign_id: adset_row['campaign_id'],
-            AdSet.Field.billing_event: "IMPRESSIONS",
-            AdSet.Field.optimization_goal: "REACH",
-            AdSet.Field.rf_prediction_id: reserved_id,
-            AdSet.Field.targeting: adset_targeting,
-            AdSet.Field.status: "PAUSED"
-        }
+    # Prepare targeting for ad set creation; mirror prediction targeting
+    adset_targeting = build_adset_targeting(prediction_params["target_spec"], combined_excluded_geo)
+    
+    adset_params = {
+        AdSet.Field.name: adset_row['adset_name'],
+        AdSet.Field.campaign_id: adset_row['campaign_id'],
+        AdSet.Field.billing_event: "IMPRESSIONS",
+        AdSet.Field.optimization_goal: "REACH",
+        AdSet.Field.rf_prediction_id: reserved_id,
+        AdSet.Field.targeting: adset_targeting,
+        AdSet.Field.status: "PAUSED"
+    }
+    adset_id = done.get("adset_id")
+    if adset_id:
+        adset_logs = 'NO ERROR'
+        print(f"↩️ Ad Set already created in an earlier run: {adset_id}")
+    else:
         try:
             print("\n🔹 Creating Ad Set...")
             adset = account.create_ad_set(fields=[], params=adset_params)
             adset_id = adset.get("id")
             adset_logs = 'NO ERROR'
+            journal.record("adset", cname, adset_spec.name, rows=adset_spec.rows, adset_id=adset_id)
             print(f"✅ Ad Set Created: {adset_id}")
         except Exception as e:
             adset_id = False
             adset_logs = e
             print(f"❌ Ad Set Creation Failed: {e}")
+            if cached:
+                # The cached prediction was reserved but cannot back this adset; start over with a fresh one
+                print("🔁 Ad set could not use the cached prediction; submitting a new prediction")
+                return retry_with_fresh_prediction(pending)
 
-        final_df.loc[(final_df['campaign_id'] == adset_row['campaign_id']) & (final_df['adset_name'] == adset_row['adset_name']), 'adset_logs'] = adset_logs
-        final_df.loc[(final_df['campaign_id'] == adset_row['campaign_id']) & (final_df['adset_name'] == adset_row['adset_name']), 'adset_id'] = adset_id
-        
-        print(f"✅ Ad Set ID {adset_id} assigned to adset {adset_row['adset_name']}")
+    results.set_adset(cname, adset_row['adset_name'], adset_logs=adset_logs, adset_id=adset_id)
+    
+    print(f"✅ Ad Set ID {adset_id} assigned to adset {adset_row['adset_name']}")
+
+    # What Meta stored is read back for every adset at the end of the run (see targeting_verifier)
+    if adset_id:
+        targeting_verifier.expect(adset_id, adset_targeting, key=(cname, adset_row['adset_name']), ignore=RF_DROPPED_TARGETING)
+
+    # Step 6: Process all ads for this adset
+    if not adset_spec.ads:
+        print("No ads detected for this adset.")
+        return
+    
+    for ad in adset_spec.ads:
+        if is_blank(ad.data):
+            print("No further ads detected for this adset.")
+            break
+        schedule_ad(cname, adset_row['adset_name'], campaign_id, prediction_id, reserved_id, adset_id, dict(ad.data))
+
+
+# Fallback for an adset whose cached prediction could not be reserved or used: a new prediction,
+# reserve and adset, ignoring the cached prediction's journaled reservation. Runs on the calling
+# work_queue thread; queueing it again could wait on a pool this thread is part of.
+def retry_with_fresh_prediction(pending):
+    pending = submit_prediction(pending.cname, pending.adset_row['campaign_id'], pending.adset_spec, reuse=False)
+    if not pending:
+        return None
+    pending = pending._replace(done={})
+    return finish_adset(pending, wait_for_prediction(pending))
 
-        # CONFIRMATION STEP: Fetch ad set details from Meta API to verify exclusions were applied
-        print(f"\n🔍 CONFIRMATION: Fetching ad set details from Meta API to verify exclusions...")
+# --mode two-phase: the prediction is only submitted here; the adset is reserved and created on
+# work_queue as soon as its own prediction completes, so predictions compute side by side and
+# adsets are finished in completion order (earliest expiry first when several are waiting).
+def submit_two_phase(cname, campaign_id, adset_spec):
+    done = Future()
+    pending = submit_prediction(cname, campaign_id, adset_spec)
+    if not pending:
+        done.set_result(None)
+        return done
+
+    # Runs as a poller / Future callback, where an exception would be logged and dropped; it fails `done` instead
+    def _finish(prediction=None):
         try:
-            # Fetch the created ad set with targeting details
-            adset_obj = AdSet(adset_id)
-            adset_details = adset_obj.api_get(fields=[
-                'id', 'name', 'targeting', 'status'
-            ])
-            
-            print(f"📋 Ad Set Details Retrieved:")
-            print(f"   ID: {adset_details.get('id')}")
-            print(f"   Name: {adset_details.get('name')}")
-            print(f"   Status: {adset_details.get('status')}")
-            
-            # Check targeting structure
-            targeting = adset_details.get('targeting', {})
-            if targeting:
-                print(f"   📍 Geo Locations: {targeting.get('geo_locations', 'Not set')}")
-                if targeting.get('geo_locations', {}).get('excluded_geo_locations'):
-                    excluded_geo = targeting['geo_locations']['excluded_geo_locations']
-                    print(f"   🚫 Excluded Geo Locations: {excluded_geo}")
-                else:
-                    print(f"   🚫 Excluded Geo Locations: None found")
-                
-                if targeting.get('exclusions'):
-                    exclusions = targeting['exclusions']
-                    print(f"   🚫 Detailed Targeting Exclusions: {exclusions}")
-                else:
-                    print(f"   🚫 Detailed Targeting Exclusions: None found")
+            error = prediction.exception() if prediction else None
+            if error and not isinstance(error, PredictionFailed):
+                done.set_exception(error)
+                return
+            status = error.status if error else 1
+            if prediction and not error:
+                remember_prediction(pending, prediction.result())
+            if error:
+                print(f"❌ Prediction {pending.prediction_id} for {adset_spec.name} failed with status: {status} ({error})")
             else:
-                print(f"   📍 Targeting: Not set or empty")
-                
+                print(f"✅ Prediction {pending.prediction_id} for {adset_spec.name} is ready to reserve.")
+            task = work_queue.submit(finish_adset, pending, status, deadline=adset_deadline(pending))
+            task.add_done_callback(lambda t: done.set_exception(t.exception()) if t.exception() else done.set_result(t.result()))
         except Exception as e:
-            print(f"⚠️ Could not fetch ad set details for confirmation: {e}")
+            if not done.done():
+                done.set_exception(e)
+
+    if needs_polling(pending):
+        prediction_poller.track(pending.prediction_id, callback=_finish)
+    else:
+        _finish()
+    return done
+
+
+####################################### AD PIPELINE #####################################
+
+# Reserve + adset creates and ads share one pool, earliest deadline first:
+# an adset whose prediction is about to expire jumps ahead of creatives/ads for adsets that already
+# exist (those have no deadline). Adset workers only wait on it, so they can move on to the next
+# prediction straight away. A video ad is only queued once its video is encoded, so no pool thread
+# sits waiting on encoding. With batching, ad threads mostly wait on their batch, so enough run at
+# once to fill a batch.
+work_queue = DeadlineExecutor(max_workers=max(2, 2 * args.workers) if batch_transport is None else MAX_BATCH_SIZE)
+ad_futures = []
+
+def schedule_ad(cname, adset_name, campaign_id, prediction_id, reserved_id, adset_id, ad_row):
+    done = Future()
+    ad_futures.append(done)
 
-        # Step 6: Process all ads for this adset
-        ad_columns = Config_Data.ad_columns
-        adset_ads = final_df[(final_df['campaign_name'] == cname) & (final_df['adset_name'] == adset_row['adset_name'])][ad_columns].drop_duplicates()
+    def _queue(_=None):
+        task = work_queue.submit(process_ad, cname, adset_name, campaign_id, prediction_id, reserved_id, adset_id, ad_row)
+        task.add_done_callback(lambda t: done.set_exception(t.exception()) if t.exception() else done.set_result(t.result()))
+
+    if adset_id and str(ad_row['ad_format']).strip().lower() != "image":
+        media_stage.ready(VIDEO_PATH).add_done_callback(_queue)
+    else:
+        _queue()
+
+# Gives every ad of an adset that will not be created an explicit status row instead of leaving it out
+def skip_ads(cname, adset_spec, ad_logs):
+    for ad in adset_spec.ads:
+        if is_blank(ad.data):
+            break
+        results.set_ad(cname, adset_spec.name, ad.name, ad_logs=ad_logs, ad_id=False)
+
+def process_ad(cname, adset_name, campaign_id, prediction_id, reserved_id, adset_id, ad_row):
+    print(f"\n--- Processing Ad: {ad_row['ad_name']} ---")
+    ad_row['adset_id'] = adset_id
+
+    if not adset_id:
+        print("Adset creation failed; skipping ad creation.")
+        ad_id = False
+        ad_logs = 'ADSET_CREATION_FAILED'
+        results.set_ad(cname, adset_name, ad_row['ad_name'], ad_logs=ad_logs, ad_id=ad_id)
+        return
+
+    ad_key = (cname, adset_name, ad_row['ad_name'])
+    ad_rows = results.ad_rows(*ad_key)
+    done = journal.get("ad", *ad_key)
+    if done.get("ad_id"):
+        print(f"↩️ Ad already created in an earlier run: {done['ad_id']}")
+        results.set_ad(*ad_key, ad_logs='NO ERROR', ad_id=done['ad_id'])
+        return
+    
+    # Step 7: Create Ad Creative and Ad
+    creative_type = ad_row['ad_format']
+    ad_name = ad_row['ad_name']
+    headline = ad_row['headline']
+    description = ad_row['description']
+    message = ad_row['primary_text']
+    link = ad_row['link']
+    image_path = IMAGE_PATH
+    video_path = VIDEO_PATH
+
+    try:
+        print(f"\n🎯 Starting ad creation process for: {ad_name}")
+        print("=" * 50)
         
-        if adset_ads.empty:
-            print("No ads detected for this adset.")
-            continue
+        creative_id = done.get("creative_id")
+        if creative_id:
+            print(f"↩️ Ad creative already created in an earlier run: {creative_id}")
+        elif creative_type.lower() == "image":
+            print("📸 Creating image-based ad creative...")
+            creative_id = create_ad_creative(creative_type, image_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+        else:
+            print("🎬 Creating video-based ad creative...")
+            creative_id = create_ad_creative(creative_type, video_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+        journal.record("ad", *ad_key, rows=ad_rows, creative_id=creative_id)
+
+        # Create Ad
+        print("\n📢 Finalizing ad creation...")
+        ad_id = create_ad(ad_row['adset_id'], creative_id, ad_name, ad_status="ACTIVE")
+        ad_logs = 'NO ERROR'
+        journal.record("ad", *ad_key, rows=ad_rows, ad_id=ad_id)
+        
+        print(f"\n🎉 Ad Creation Complete!")
+        print("=" * 50)
+        print(f"✅ Campaign ID: {campaign_id}")
+        print(f"✅ Prediction ID: {prediction_id}")
+        print(f"✅ Reserved Prediction ID: {reserved_id}")
+        print(f"✅ Ad Set ID: {adset_id}")
+        print(f"✅ Creative ID: {creative_id}")
+        print(f"✅ Ad ID: {ad_id}")
+        print("=" * 50)
         
-        for ad_idx, ad_row in adset_ads.iterrows():
-            if ad_row.isnull().all():
-                print("No further ads detected for this adset.")
+    except Exception as e:
+        ad_id = False
+        ad_logs = e
+        print(f"❌ Ad Creation Failed: {e}")
+
+    results.set_ad(cname, adset_name, ad_row['ad_name'], ad_logs=ad_logs, ad_id=ad_id)
+
+
+####################################### AUCTION PIPELINE #####################################
+
+# Auction campaigns for the objectives in Config_Data.campaign_objectives need no prediction or
+# reservation, so a whole campaign -> adsets -> creatives -> ads tree is sent as one dependent
+# batch (one request per 50 calls) instead of waiting on a round trip per object.
+def is_auction_campaign(camp_row):
+    return str(camp_row['buy_type']).strip().upper() == "AUCTION" and camp_row['objective'] in Config_Data.campaign_objectives
+
+# A blank bid_strategy means LOWEST_COST_WITHOUT_CAP; one that cannot be honoured is refused, never swapped for another
+def auction_bid_strategy(objective, bid_strategy, bid_amount):
+    if pd.isna(bid_strategy) or not str(bid_strategy).strip():
+        return 'LOWEST_COST_WITHOUT_CAP'
+    allowed = Config_Data.campaign_objectives[objective]['bid_strategy']
+    wanted = str(bid_strategy).strip().upper().replace(" ", "_")
+    strategy = next((b for b in allowed if b == wanted), None) or next((b for b in allowed if b.endswith(wanted)), None)
+    if strategy is None:
+        raise ValueError(f"bid_strategy {bid_strategy} is not supported for {objective}")
+    if strategy in ('COST_CAP', 'LOWEST_COST_WITH_BID_CAP') and pd.isna(bid_amount):
+        raise ValueError(f"bid_strategy {bid_strategy} ({strategy}) needs a bid_amount")
+    return strategy
+
+def build_auction_adset_params(adset_row, bid_strategy, campaign_id, excluded_geo):
+    destination = str(adset_row['conversion_location']).strip().upper()
+    settings = Config_Data.campaign_objectives[adset_row['objective']]['adset_settings']['destination_type'].get(destination)
+    if settings is None:
+        raise ValueError(f"conversion_location {adset_row['conversion_location']} is not supported for {adset_row['objective']}")
+    start_dt, stop_dt = parse_adset_dates(adset_row)
+    if start_dt is None:
+        raise ValueError(f"Invalid dates: start_date={adset_row['start_date']}, end_date={adset_row['end_date']}")
+    fbpage = str(adset_row['fbpage'])
+    params = {
+        AdSet.Field.name: adset_row['adset_name'],
+        AdSet.Field.campaign_id: campaign_id,
+        AdSet.Field.billing_event: settings['billing_event'],
+        AdSet.Field.optimization_goal: settings['optimization_goal'],
+        AdSet.Field.destination_type: destination,
+        AdSet.Field.bid_strategy: auction_bid_strategy(adset_row['objective'], bid_strategy, adset_row.get('bid_amount')),
+        AdSet.Field.lifetime_budget: int(adset_row['adset_budget_amount']),
+        AdSet.Field.start_time: int(start_dt.timestamp()),
+        AdSet.Field.end_time: int(stop_dt.timestamp()),
+        AdSet.Field.promoted_object: {"page_id": fbpage.replace("pg_", "") if fbpage.startswith("pg_") else fbpage},
+        AdSet.Field.targeting: build_adset_targeting(build_target_spec(adset_row, excluded_geo), excluded_geo),
+        AdSet.Field.status: "PAUSED"
+    }
+    if not pd.isna(adset_row.get('bid_amount')):
+        params[AdSet.Field.bid_amount] = int(adset_row['bid_amount'])
+    return params
+
+def process_auction_campaign(campaign_spec):
+    camp_row = campaign_spec.data
+    cname = campaign_spec.name
+    tree = DependentBatch()
+    excluded_geo = build_excluded_geo()
+
+    campaign_id = journal.get("campaign", cname).get("campaign_id")
+    if campaign_id:
+        print(f"↩️ Campaign already created in an earlier run: {campaign_id}")
+        tree.resolve("campaign", campaign_id)
+    else:
+        tree.add("campaign", "POST", (ad_account_id, "campaigns"), build_campaign_params(camp_row))
+
+    adset_calls = []  # (call name, adset spec)
+    ad_calls = []  # (creative call name, ad call name, adset spec, ad spec)
+    for a, adset_spec in enumerate(campaign_spec.adsets):
+        adset_call = f"adset{a}"
+        adset_id = journal.get("adset", cname, adset_spec.name).get("adset_id")
+        if adset_id:
+            tree.resolve(adset_call, adset_id)
+        else:
+            try:
+                adset_params = build_auction_adset_params(dict(adset_spec.data), camp_row['bid_strategy'], result_ref("campaign"), excluded_geo)
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"❌ Ad Set {adset_spec.name} skipped: {e}")
+                results.set_adset(cname, adset_spec.name, adset_logs=e)
+                skip_ads(cname, adset_spec, 'ADSET_CREATION_FAILED')
+                continue
+            tree.add(adset_call, "POST", (ad_account_id, "adsets"), adset_params)
+        adset_calls.append((adset_call, adset_spec, None if adset_id else adset_params[AdSet.Field.targeting]))
+
+        for d, ad in enumerate(adset_spec.ads):
+            if is_blank(ad.data):
                 break
-            print(f"\n--- Processing Ad: {ad_row['ad_name']} ---")
-            ad_row['adset_id'] = adset_id
-
-            if not adset_id:
-                print("Adset creation failed; skipping ad creation.")
-                ad_id = False
-                ad_logs = 'ADSET_CREATION_FAILED'
-                final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_logs'] = ad_logs
-                final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_id'] = ad_id
+            done = journal.get("ad", cname, adset_spec.name, ad.name)
+            if done.get("ad_id"):
+                results.set_ad(cname, adset_spec.name, ad.name, ad_logs='NO ERROR', ad_id=done['ad_id'])
+                continue
+            creative_call, ad_call = f"creative{a}_{d}", f"ad{a}_{d}"
+            if done.get("creative_id"):
+                tree.resolve(creative_call, done['creative_id'])
+            else:
+                ad_row = ad.data
+                media_path = IMAGE_PATH if str(ad_row['ad_format']).strip().lower() == "image" else VIDEO_PATH
+                try:
+                    creative_params = build_creative_params(ad_row['ad_format'], media_path, ad.name, ad_row['headline'], ad_row['description'], ad_row['primary_text'], ad_row['link'], ad_row['call_to_action'])
+                except Exception as e:
+                    print(f"❌ Ad {ad.name} skipped: {e}")
+                    results.set_ad(cname, adset_spec.name, ad.name, ad_logs=e, ad_id=False)
+                    continue
+                tree.add(creative_call, "POST", (ad_account_id, "adcreatives"), creative_params)
+            tree.add(ad_call, "POST", (ad_account_id, "ads"), build_ad_params(result_ref(adset_call), result_ref(creative_call), ad.name))
+            ad_calls.append((creative_call, ad_call, adset_spec, ad))
+
+    print(f"\n🔹 Creating campaign {cname} with {len(adset_calls)} adset(s) and {len(ad_calls)} ad(s) in {-(-len(tree) // MAX_BATCH_SIZE)} batch request(s)...")
+    outcome = tree.execute()
+
+    def _id_and_logs(call):
+        result = outcome.get(call)
+        if isinstance(result, Exception):
+            return False, result
+        return result.get("id"), 'NO ERROR'
+
+    campaign_id, camp_logs = _id_and_logs("campaign")
+    journal.record("campaign", cname, rows=campaign_spec.rows, campaign_id=campaign_id)
+    results.set_campaign(cname, campaign_logs=camp_logs, campaign_id=campaign_id or '')
+    print(f"✅ Campaign Created: {campaign_id}" if campaign_id else f"❌ Campaign Creation Failed: {camp_logs}")
+
+    for adset_call, adset_spec, targeting in adset_calls:
+        adset_id, adset_logs = _id_and_logs(adset_call)
+        if adset_id and targeting:
+            targeting_verifier.expect(adset_id, targeting, key=(cname, adset_spec.name))
+        journal.record("adset", cname, adset_spec.name, rows=adset_spec.rows, adset_id=adset_id)
+        results.set_adset(cname, adset_spec.name, adset_logs=adset_logs, adset_id=adset_id)
+        print(f"✅ Ad Set Created: {adset_id}" if adset_id else f"❌ Ad Set Creation Failed for {adset_spec.name}: {adset_logs}")
+
+    for creative_call, ad_call, adset_spec, ad in ad_calls:
+        creative_id, _ = _id_and_logs(creative_call)
+        ad_id, ad_logs = _id_and_logs(ad_call)
+        journal.record("ad", cname, adset_spec.name, ad.name, rows=ad.rows, creative_id=creative_id, ad_id=ad_id)
+        results.set_ad(cname, adset_spec.name, ad.name, ad_logs=ad_logs, ad_id=ad_id)
+        print(f"✅ Ad Created: {ad_id}" if ad_id else f"❌ Ad Creation Failed for {ad.name}: {ad_logs}")
+
+
+####################################### COMPLETE CAMPAIGN FLOW #####################################
+# Check if there are any valid campaigns to process
+if not plan:
+    print("No campaigns detected in the data.")
+    exit()
+
+workers = max(1, args.workers)
+executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+adset_futures = {}
+if executor:
+    print(f"⚙️ Running adsets with {workers} concurrent workers")
+if args.mode == "two-phase":
+    print("⚙️ Two-phase mode: submitting every prediction first, then reserving adsets as predictions complete")
+
+def build_campaign_params(camp_row):
+    return {
+        Campaign.Field.name: camp_row['campaign_name'],
+        Campaign.Field.objective: camp_row['objective'],
+        Campaign.Field.status: "PAUSED",
+        Campaign.Field.buying_type: camp_row['buy_type'],
+        Campaign.Field.special_ad_categories: ["NONE"]
+    }
+
+def is_valid_campaign(camp_row):
+    return not (pd.isna(camp_row['campaign_name']) or pd.isna(camp_row['objective']) or pd.isna(camp_row['buy_type']))
+
+####################################### PREFLIGHT #####################################
+
+# --preflight: status 3 ("Cannot reach audience") otherwise only shows up after a prediction has been
+# submitted and polled for minutes. One cached audience estimate per unique targeting spec, fetched
+# together, rejects the adsets that cannot reach the R&F minimum up front.
+# (campaign name, adset name) -> why the adset was rejected
+preflight_rejects = {}
+
+def run_preflight():
+    excluded_geo = build_excluded_geo()
+    specs = {}
+    adset_specs = {}
+    for campaign_spec in plan:
+        if is_blank(campaign_spec.data) or not is_valid_campaign(campaign_spec.data):
+            break
+        if is_auction_campaign(campaign_spec.data):
+            continue
+        for adset_spec in campaign_spec.adsets:
+            if journal.get("adset", campaign_spec.name, adset_spec.name).get("prediction_id"):
                 continue
-            
-            # Step 7: Create Ad Creative and Ad
-            creative_type = ad_row['ad_format']
-            ad_name = ad_row['ad_name']
-            headline = ad_row['headline']
-            description = ad_row['description']
-            message = ad_row['primary_text']
-            link = ad_row['link']
-            image_path = r"sampleimage.png"
-            video_path = r"sampleVideo.mp4"
+            try:
+                specs[(campaign_spec.name, adset_spec.name)] = build_target_spec(dict(adset_spec.data), excluded_geo)
+                adset_specs[(campaign_spec.name, adset_spec.name)] = adset_spec
+            except Exception as e:
+                print(f"⚠️ Pre-flight skipped for {adset_spec.name}: {e}")
+
+    estimates = AudienceEstimator(ad_account_id, transport=batch_transport).estimate_many(specs.values())
+    minimum = Config_Data.rf_min_audience_size
+    for (cname, adset_name), spec in specs.items():
+        estimate = estimates[spec_digest(ad_account_id, spec)]
+        if isinstance(estimate, Exception):
+            print(f"⚠️ No audience estimate for {adset_name}, leaving it to the prediction: {estimate}")
+        elif estimate[1] < minimum:
+            reason = f"PREFLIGHT: estimated audience {estimate[0]}-{estimate[1]} is below the R&F minimum of {minimum}"
+            print(f"⛔ {adset_name}: {reason}")
+            preflight_rejects[(cname, adset_name)] = reason
+            results.set_adset(cname, adset_name, adset_logs=reason)
+            skip_ads(cname, adset_specs[(cname, adset_name)], 'PREFLIGHT_REJECTED')
+    print(f"✅ Pre-flight: {len(specs) - len(preflight_rejects)} of {len(specs)} adset(s) can meet the R&F minimum audience")
+
+# The adsets of a campaign that passed pre-flight
+def preflight_adsets(campaign_spec):
+    return [a for a in campaign_spec.adsets if (campaign_spec.name, a.name) not in preflight_rejects]
+
+# A campaign is only worth creating if at least one of its adsets passed pre-flight
+def preflight_rejected(campaign_spec):
+    return bool(campaign_spec.adsets) and not preflight_adsets(campaign_spec)
+
+####################################### VALIDATE #####################################
+
+# --validate: every campaign and creative payload the run would send is checked by Meta with
+# execution_options=["validate_only"] (nothing is created) in batch requests of 50. Adsets and ads
+# cannot be validated by Meta before their campaign / adset exist, so they get local checks of what
+# the run would build, and adset targeting is checked through the reach estimate endpoint.
+# One verdict per level and input row goes to validation_report.csv.
+VALIDATE_ONLY = ["validate_only"]
+
+def describe_error(e):
+    if isinstance(e, FacebookRequestError):
+        body = e.body() if isinstance(e.body(), dict) else {}
+        return body.get("error", {}).get("error_user_msg") or e.api_error_message() or str(e)
+    return str(e)
+
+def check_rf_adset(adset_row):
+    problems = []
+    start_dt, stop_dt = parse_adset_dates(adset_row)
+    if start_dt is None:
+        problems.append(f"invalid dates: start_date={adset_row['start_date']}, end_date={adset_row['end_date']}")
+    elif stop_dt <= start_dt:
+        problems.append("end_date must be after start_date")
+    for column in ('adset_budget_amount', 'frequency_cap', 'prediction_mode', 'age_min', 'age_max'):
+        try:
+            int(adset_row[column])
+        except (TypeError, ValueError):
+            problems.append(f"{column} must be a whole number, got {adset_row[column]!r}")
+    if is_blank({'fbpage': adset_row['fbpage']}):
+        problems.append("fbpage (destination_id) is required")
+    return problems
+
+def check_ad(ad_row):
+    problems = []
+    if str(ad_row['ad_format']).strip().lower() not in ("image", "video"):
+        problems.append(f"ad_format must be image or video, got {ad_row['ad_format']!r}")
+    if str(ad_row['ad_status']).strip().upper() not in ("ACTIVE", "PAUSED"):
+        problems.append(f"ad_status must be ACTIVE or PAUSED, got {ad_row['ad_status']!r}")
+    for column in ('call_to_action', 'link'):
+        if is_blank({column: ad_row[column]}):
+            problems.append(f"{column} is required")
+    return problems
+
+def validate_plan():
+    report = ResultStore(df, columns=['campaign_validation', 'adset_validation', 'ad_validation'])
+    transport = batch_transport or BatchTransport()
+    excluded_geo = build_excluded_geo()
+    # Cached media is reused; an uncached image is uploaded (the real run reuses it), a video is not
+    video_id = media_cache.get(ad_account_id, "video", VIDEO_PATH)
+    problems = {}  # (setter, key, column) -> [problem, ...]
+    pending = []  # (setter, key, column, label, future)
+    target_specs = {}  # (cname, adset_name) -> target spec
+
+    for campaign_spec in plan:
+        camp_row = campaign_spec.data
+        if is_blank(camp_row):
+            break
+        cname = campaign_spec.name
+        campaign_key = (report.set_campaign, (cname,), 'campaign_validation')
+        problems.setdefault(campaign_key, [])
+        if not is_valid_campaign(camp_row):
+            problems[campaign_key].append("campaign_name, objective and buy_type are required (the run stops here)")
+            break
+        pending.append((*campaign_key, "campaign", transport.submit(
+            "POST", (ad_account_id, "campaigns"), {**build_campaign_params(camp_row), "execution_options": VALIDATE_ONLY}, label=cname)))
+
+        for adset_spec in campaign_spec.adsets:
+            adset_row = dict(adset_spec.data)
+            adset_key = (report.set_adset, (cname, adset_spec.name), 'adset_validation')
+            try:
+                if is_auction_campaign(camp_row):
+                    build_auction_adset_params(adset_row, camp_row['bid_strategy'], "0", excluded_geo)
+                    problems[adset_key] = []
+                else:
+                    problems[adset_key] = check_rf_adset(adset_row)
+                target_specs[(cname, adset_spec.name)] = build_target_spec(adset_row, excluded_geo)
+            except Exception as e:
+                problems.setdefault(adset_key, []).append(describe_error(e))
+
+            for ad in adset_spec.ads:
+                ad_row = ad.data
+                if is_blank(ad_row):
+                    break
+                ad_key = (report.set_ad, (cname, adset_spec.name, ad.name), 'ad_validation')
+                problems[ad_key] = check_ad(ad_row)
+                is_video = str(ad_row['ad_format']).strip().lower() != "image"
+                if problems[ad_key]:
+                    continue
+                if is_video and not video_id:
+                    problems[ad_key].append("OK locally; video not uploaded yet, so the creative was not sent to Meta")
+                    continue
+                try:
+                    creative_params = build_creative_params(
+                        ad_row['ad_format'], VIDEO_PATH if is_video else IMAGE_PATH, ad.name, ad_row['headline'],
+                        ad_row['description'], ad_row['primary_text'], ad_row['link'], ad_row['call_to_action'], video_id=video_id)
+                except Exception as e:
+                    problems[ad_key].append(describe_error(e))
+                    continue
+                pending.append((*ad_key, "creative", transport.submit(
+                    "POST", (ad_account_id, "adcreatives"), {**creative_params, "execution_options": VALIDATE_ONLY}, label=ad.name)))
 
+    print(f"\n🔹 Validating {len(pending)} payload(s) and {len(target_specs)} targeting spec(s) with Meta...")
+    estimates = AudienceEstimator(ad_account_id, transport=transport).estimate_many(target_specs.values())
+    for (cname, adset_name), spec in target_specs.items():
+        estimate = estimates[spec_digest(ad_account_id, spec)]
+        if isinstance(estimate, Exception):
+            problems[(report.set_adset, (cname, adset_name), 'adset_validation')].append(f"targeting: {describe_error(estimate)}")
+    for setter, key, column, label, future in pending:
+        try:
+            future.result()
+        except Exception as e:
+            problems[(setter, key, column)].append(f"{label}: {describe_error(e)}")
+    if transport is not batch_transport:
+        transport.close()
+
+    errors = 0
+    for (setter, key, column), found in problems.items():
+        failed = [p for p in found if not p.startswith("OK")]
+        errors += bool(failed)
+        setter(*key, **{column: f"ERROR: {'; '.join(failed)}" if failed else (found[0] if found else "OK")})
+        if failed:
+            print(f"❌ {' / '.join(map(str, key))}: {'; '.join(failed)}")
+    report.save('validation_report.csv')
+    print(f"{'✅' if not errors else '⚠️'} Validation finished: {errors} of {len(problems)} object(s) with errors; see validation_report.csv")
+
+if args.validate:
+    validate_plan()
+    if batch_transport:
+        batch_transport.close()
+    exit()
+
+if args.preflight:
+    run_preflight()
+
+# Queue every campaign create up front, so they reach Meta in batches instead of one request per campaign
+campaign_requests = {}
+if batch_transport:
+    for campaign_spec in plan:
+        if is_blank(campaign_spec.data) or not is_valid_campaign(campaign_spec.data):
+            break
+        cname = campaign_spec.name
+        if not is_auction_campaign(campaign_spec.data) and not preflight_rejected(campaign_spec) and cname not in campaign_requests and not journal.get("campaign", cname).get("campaign_id") and not prediction_cache.campaign_id(ad_account_id, cname):
+            campaign_requests[cname] = batch_transport.submit("POST", (ad_account_id, "campaigns"), build_campaign_params(campaign_spec.data), label=cname)
+
+# Start uploading the plan's videos now; encoding runs while campaigns, predictions and adsets are created
+media_stage.start(VIDEO_PATH for fmt in df['ad_format'].dropna() if str(fmt).strip().lower() != "image")
+
+# Results and the journal are flushed in finally, so Ctrl-C or a crash mid-run still leaves both on disk
+try:
+    for campaign_spec in plan:
+        camp_row = campaign_spec.data
+        # Skip empty or invalid campaign rows
+        if is_blank(camp_row):
+            print("No further campaigns detected.")
+            break
+        if not is_valid_campaign(camp_row):
+            print("\n🔹 No further campaigns detected.")
+            break
+    
+        print(f"\n{'='*60}")
+        print(f"Processing Campaign: {camp_row['campaign_name']}")
+        print(f"{'='*60}")
+
+        if is_auction_campaign(camp_row):
+            process_auction_campaign(campaign_spec)
+            continue
+
+        if preflight_rejected(campaign_spec):
+            print(f"⛔ No adset of {campaign_spec.name} passed pre-flight; not creating the campaign")
+            results.set_campaign(campaign_spec.name, campaign_logs='PREFLIGHT: no adset can meet the R&F minimum audience')
+            continue
+    
+        # Step 1: Create Campaign
+        print("\n🔹 Creating Campaign...")
+        cname = camp_row['campaign_name']
+    
+        campaign_id = journal.get("campaign", cname).get("campaign_id") or prediction_cache.campaign_id(ad_account_id, cname)
+        if campaign_id and not journal.get("campaign", cname).get("campaign_id"):
+            # An earlier run left finished, unreserved predictions in this campaign; its adsets go there to reuse them
+            camp_logs = 'NO ERROR'
+            journal.record("campaign", cname, rows=campaign_spec.rows, campaign_id=campaign_id)
+            print(f"♻️ Reusing campaign {campaign_id} from an earlier run, which has cached predictions")
+        elif campaign_id:
+            camp_logs = 'NO ERROR'
+            print(f"↩️ Campaign already created in an earlier run: {campaign_id}")
+        else:
             try:
-                print(f"\n🎯 Starting ad creation process for: {ad_name}")
-                print("=" * 50)
-                
-                if creative_type.lower() == "image":
-                    print("📸 Creating image-based ad creative...")
-                    creative_id = create_ad_creative(creative_type, image_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
+                if cname in campaign_requests:
+                    campaign_id = campaign_requests.pop(cname).result().get("id")
                 else:
-                    print("🎬 Creating video-based ad creative...")
-                    creative_id = create_ad_creative(creative_type, video_path, ad_name, headline, description, message, link, ad_row['call_to_action'])
-
-                # Create Ad
-                print("\n📢 Finalizing ad creation...")
-                ad_id = create_ad(ad_row['adset_id'], creative_id, ad_name, ad_status="ACTIVE")
-                ad_logs = 'NO ERROR'
-                
-                print(f"\n🎉 Ad Creation Complete!")
-                print("=" * 50)
-                print(f"✅ Campaign ID: {campaign_id}")
-                print(f"✅ Prediction ID: {prediction_id}")
-                print(f"✅ Reserved Prediction ID: {reserved_id}")
-                print(f"✅ Ad Set ID: {adset_id}")
-                print(f"✅ Creative ID: {creative_id}")
-                print(f"✅ Ad ID: {ad_id}")
-                print("=" * 50)
-                
+                    campaign_id = account.create_campaign(fields=[], params=build_campaign_params(camp_row)).get("id")
+                camp_logs = 'NO ERROR'
+                journal.record("campaign", cname, rows=campaign_spec.rows, campaign_id=campaign_id)
+                print(f"✅ Campaign Created: {campaign_id}")
             except Exception as e:
-                ad_id = False
-                ad_logs = e
-                print(f"❌ Ad Creation Failed: {e}")
+                campaign_id = ''
+                camp_logs = e
+                print(f"❌ Campaign Creation Failed: {e}")
+                continue  # Skip to next campaign if this one fails
+
+        results.set_campaign(cname, campaign_logs=camp_logs, campaign_id=campaign_id)
 
-            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_logs'] = ad_logs
-            final_df.loc[final_df['ad_name'] == ad_row['ad_name'], 'ad_id'] = ad_id
+        # Step 2: Process all adsets for this campaign
+        for adset_spec in preflight_adsets(campaign_spec):
+            if args.mode == "two-phase":
+                adset_futures[submit_two_phase(cname, campaign_id, adset_spec)] = (cname, adset_spec.name)
+            elif executor is None:
+                process_adset(cname, campaign_id, adset_spec)
+            else:
+                future = executor.submit(process_adset, cname, campaign_id, adset_spec)
+                adset_futures[future] = (cname, adset_spec.name)
+
+    # Wait for every adset pipeline; a crash in one adset must not lose the others' results
+    for future, (cname, adset_name) in adset_futures.items():
+        try:
+            future.result()
+        except Exception as e:
+            print(f"❌ Adset pipeline failed for {adset_name}: {e}")
+            results.set_adset(cname, adset_name, adset_logs=e)
+    if executor:
+        executor.shutdown()
+
+    # Ads are queued as their adsets (and videos) become ready; wait for the last of them
+    for future in ad_futures:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"❌ Ad pipeline failed: {e}")
+    work_queue.shutdown()
+    media_stage.shutdown()
 
-# Save results to CSV
-final_df.to_csv('finaloutput.csv', index=False)
+    for (cname, adset_name), verdict in targeting_verifier.verify().items():
+        results.set_adset(cname, adset_name, verification=verdict)
+finally:
+    if batch_transport:
+        batch_transport.close()
+    # Save results to CSV
+    results.save('finaloutput.csv')
+    journal.close()
@@ -1,21 +1,30 @@
+import argparse
 import os
-import time
-import requests
 from dotenv import load_dotenv
 
+import medulla_path  # noqa: F401  (makes MedullaPOCFile/throttle.py importable)
+from throttle import default_throttle
+from interest_catalog import InterestCatalog
+
 # Load token from .env file
 load_dotenv()
 ACCESS_TOKEN = os.getenv("FB_ACCESS_TOKEN")
 
-# Get user input for number of interests
-while True:
-    try:
-        interest_count = int(input("Enter number of interests to generate (1-100): "))
-        if 1 <= interest_count <= 100:
-            break
-        print("Please enter a number between 1 and 100")
-    except ValueError:
-        print("Please enter a valid number")
+# Searches are paced from Meta's rate-limit headers instead of a fixed sleep per keyword
+session = default_throttle.session()
+
+
+def interest_count_arg(value):
+    count = int(value)
+    if not 1 <= count <= 100:
+        raise argparse.ArgumentTypeError("must be between 1 and 100")
+    return count
+
+
+# Number of interests to generate comes from the command line (no interactive prompt), e.g. --count 40
+parser = argparse.ArgumentParser(description="Collect Meta ad interest IDs for the stock keyword list")
+parser.add_argument("--count", type=interest_count_arg, default=20, help="Number of interests to generate (1-100)")
+interest_count = parser.parse_args().count
 
 # List of interest keywords to search
 keywords = [
@@ -28,36 +37,25 @@ keywords = [
     "space", "environment", "sustainability", "culture", "finance tips", "crypto", "stocks"
 ]
 
-def search_valid_interests(keyword, limit=2):
-    url = "https://graph.facebook.com/v19.0/search"
-    params = {
-        "type": "adinterest",
-        "q": keyword,
-        "limit": limit,
-        "access_token": ACCESS_TOKEN
-    }
-    try:
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            return response.json().get("data", [])
-        else:
-            print(f"⚠️ Error for '{keyword}':", response.json())
-            return []
-    except Exception as e:
-        print(f"❌ Exception for '{keyword}':", e)
-        return []
+# Searches are answered from the local catalog; only new or expired keywords go to Meta, several at a time
+catalog = InterestCatalog(session, ACCESS_TOKEN, ttl=int(os.getenv("INTEREST_CATALOG_TTL", 7 * 24 * 3600)))
 
 valid_interests = []
-for kw in keywords:
-    interests = search_valid_interests(kw)
-    for interest in interests:
-        valid_interests.append({
-            "id": interest["id"],
-            "name": interest["name"]
-        })
-    if len(valid_interests) >= interest_count:
-        break
-    time.sleep(0.3)  # gentle rate limiting
+seen_ids = set()
+remaining = list(dict.fromkeys(keywords))
+while remaining and len(valid_interests) < interest_count:
+    # Only search as many keywords as the missing interests need (2 per keyword), at least a full pool's worth
+    wave = remaining[:max(catalog.parallel, -(-(interest_count - len(valid_interests)) // 2))]
+    remaining = remaining[len(wave):]
+    found = catalog.search_many(wave)
+    for kw in wave:
+        for interest in found[kw]:
+            if interest["id"] not in seen_ids:
+                seen_ids.add(interest["id"])
+                valid_interests.append({
+                    "id": interest["id"],
+                    "name": interest["name"]
+                })
 
 # Limit to requested count
 valid_interests = valid_interests[:interest_count]
@@ -66,3 +64,5 @@ valid_interests = valid_interests[:interest_count]
 print(f"\n✅ Total Valid Interests Collected: {len(valid_interests)}\n")
 for i, interest in enumerate(valid_interests, 1):
     print(f"{i:2d}. {interest['name']} — ID: {interest['id']}")
+
+print("\n💡 Look up any catalogued interest by name offline: python interest_index.py \"finance tips\"")
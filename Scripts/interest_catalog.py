@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SEARCH_URL = "https://graph.facebook.com/v19.0/search"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interests (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    audience_size_lower_bound INTEGER,
+    audience_size_upper_bound INTEGER,
+    path TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS searches (
+    keyword TEXT NOT NULL,
+    result_limit INTEGER NOT NULL,
+    interest_ids TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (keyword, result_limit)
+);
+"""
+
+
+def _normalize(keyword):
+    return " ".join(str(keyword).lower().split())
+
+
+class InterestCatalog:
+    """
+    Local SQLite catalog of Meta ad interests found through /search?type=adinterest.
+
+    Every interest a search returns is stored with its name, audience size bounds, path and fetch
+    time, and every search with the IDs it returned, so a keyword searched before is answered
+    without a request. Entries older than `ttl` seconds count as missing and are searched again.
+    search_many() sends the missing keywords concurrently (`parallel` at a time) over one pooled
+    session, e.g. default_throttle.session(), so a cold run is bounded by Meta's rate limit.
+    """
+
+    def __init__(self, session, access_token, path=os.path.join(".meta_cache", "interest_catalog.sqlite"),
+                 ttl=7 * 24 * 3600, parallel=8):
+        self.session = session
+        self.access_token = access_token
+        self.ttl = ttl
+        self.parallel = parallel
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def search(self, keyword, limit=2):
+        return self.search_many([keyword], limit)[keyword]
+
+    def search_many(self, keywords, limit=2):
+        """{keyword: [interest, ...]} for every keyword; only the uncached / expired ones hit the API."""
+        results = {keyword: self._cached(keyword, limit) for keyword in dict.fromkeys(keywords)}
+        missing = [keyword for keyword, found in results.items() if found is None]
+        if missing:
+            print(f"🔎 Searching {len(missing)} keyword(s) not in the interest catalog...")
+            with ThreadPoolExecutor(max_workers=max(1, self.parallel)) as executor:
+                fetched = list(executor.map(lambda keyword: self._fetch(keyword, limit), missing))
+            for keyword, found in zip(missing, fetched):
+                if found is not None:
+                    self._store(keyword, limit, found)
+                results[keyword] = found or []
+        return results
+
+    def get(self, interest_id):
+        """A catalogued interest by ID (however old), or None."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM interests WHERE id = ?", (str(interest_id),)).fetchone()
+        return self._interest(row) if row else None
+
+    def interests(self):
+        """Every catalogued interest, expired or not (e.g. to build an InterestIndex)."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM interests").fetchall()
+        return [self._interest(row) for row in rows]
+
+    def _cached(self, keyword, limit):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            search = self._db.execute(
+                "SELECT interest_ids FROM searches WHERE keyword = ? AND result_limit = ? AND fetched_at >= ?",
+                (_normalize(keyword), limit, cutoff),
+            ).fetchone()
+            if search is None:
+                return None
+            ids = json.loads(search["interest_ids"])
+            rows = {
+                row["id"]: row for row in self._db.execute(
+                    f"SELECT * FROM interests WHERE id IN ({','.join('?' * len(ids))})", ids,
+                )
+            } if ids else {}
+        if any(i not in rows for i in ids):
+            return None
+        return [self._interest(rows[i]) for i in ids]
+
+    def _fetch(self, keyword, limit):
+        params = {"type": "adinterest", "q": keyword, "limit": limit, "access_token": self.access_token}
+        try:
+            response = self.session.get(SEARCH_URL, params=params)
+            if response.status_code == 200:
+                return response.json().get("data", [])
+            print(f"⚠️ Error for '{keyword}':", response.json())
+        except Exception as e:
+            print(f"❌ Exception for '{keyword}':", e)
+        return None
+
+    def _store(self, keyword, limit, interests):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO interests VALUES (?, ?, ?, ?, ?, ?)",
+                [(
+                    str(i["id"]), i.get("name", ""), i.get("audience_size_lower_bound"), i.get("audience_size_upper_bound"),
+                    json.dumps(i.get("path") or []), now,
+                ) for i in interests],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                (_normalize(keyword), limit, json.dumps([str(i["id"]) for i in interests]), now),
+            )
+
+    @staticmethod
+    def _interest(row):
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "audience_size_lower_bound": row["audience_size_lower_bound"],
+            "audience_size_upper_bound": row["audience_size_upper_bound"],
+            "path": json.loads(row["path"] or "[]"),
+            "fetched_at": row["fetched_at"],
+        }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,133 @@
+import bisect
+import re
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from interest_catalog import InterestCatalog
+
+
+def _normalize(text):
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", str(text).lower()).split())
+
+
+def _trigrams(text):
+    # Each word padded on its own, so the start of every word weighs in like a prefix: "  f", " fi", "fit", ...
+    return {padded[i:i + 3] for word in text.split() for padded in (f"  {word} ",) for i in range(len(padded) - 2)}
+
+
+class InterestIndex:
+    """
+    In-process fuzzy name search over catalogued interests (see InterestCatalog.interests()).
+
+    Interests are held largest audience (upper bound) first, so a lower position always wins a tie.
+    Names are indexed two ways: sorted lists of full names and of every word for prefix lookups by
+    bisection, and an inverted index from character trigram to interest positions for typo-tolerant
+    matches, scored by how many of the query's trigrams the name contains (so a misspelt word still
+    matches inside a longer name, e.g. "fitnss" finds "Physical fitness"). search() ranks full-name prefix matches first,
+    then word-prefix matches, then fuzzy matches by similarity; the fuzzy pass only runs when the
+    prefix matches do not fill the result.
+    """
+
+    def __init__(self, interests, min_similarity=0.5):
+        self.interests = sorted(
+            interests,
+            key=lambda i: -(i.get("audience_size_upper_bound") or i.get("audience_size_lower_bound") or 0),
+        )
+        self.min_similarity = min_similarity
+        names = [_normalize(i["name"]) for i in self.interests]
+
+        postings = defaultdict(list)
+        for position, name in enumerate(names):
+            for gram in _trigrams(name):
+                postings[gram].append(position)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+        self._names, self._name_positions = self._sorted_keys((name, position) for position, name in enumerate(names))
+        self._words, self._word_positions = self._sorted_keys(
+            (word, position) for position, name in enumerate(names) for word in set(name.split())
+        )
+
+    @classmethod
+    def from_catalog(cls, catalog, **kwargs):
+        return cls(catalog.interests(), **kwargs)
+
+    @staticmethod
+    def _sorted_keys(pairs):
+        pairs = sorted(pairs)
+        return [key for key, _ in pairs], np.array([position for _, position in pairs], dtype=np.int32)
+
+    @staticmethod
+    def _prefixed(keys, positions, prefix, limit):
+        """The `limit` lowest distinct positions whose key starts with `prefix`."""
+        found = positions[bisect.bisect_left(keys, prefix):bisect.bisect_left(keys, prefix + "\uffff")]
+        if len(found) > 4 * limit:
+            # The distinct values among the 4 * limit smallest are the smallest distinct values overall
+            head = np.unique(np.partition(found, 4 * limit)[:4 * limit])
+            if len(head) >= limit:
+                return head[:limit]
+        return np.unique(found)[:limit]
+
+    def _fuzzy(self, query):
+        """(positions, similarity) of every interest whose name contains at least min_similarity of the query's trigrams."""
+        grams = _trigrams(query)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        candidates, shared = np.unique(np.concatenate(lists), return_counts=True)
+        similarity = shared / len(grams)
+        keep = similarity >= self.min_similarity
+        return candidates[keep], similarity[keep]
+
+    def search(self, query, limit=10):
+        """Best matching interests for a typed name, partial word or misspelling; each with a 0-1 "score"."""
+        query = _normalize(query)
+        if not query or not self.interests or limit <= 0:
+            return []
+
+        found = {}  # position -> score, in rank order
+        for position in self._prefixed(self._names, self._name_positions, query, limit):
+            found[int(position)] = 1.0
+        for position in self._prefixed(self._words, self._word_positions, query, 2 * limit):
+            if len(found) >= limit:
+                break
+            found.setdefault(int(position), 1.0)
+
+        if len(found) < limit:
+            candidates, similarity = self._fuzzy(query)
+            # np.lexsort sorts by the last key first: similarity (to 0.05), then position (audience)
+            for i in np.lexsort((candidates, -np.round(similarity * 20))):
+                if len(found) >= limit:
+                    break
+                found.setdefault(int(candidates[i]), round(float(similarity[i]), 3))
+
+        return [{**self.interests[position], "score": score} for position, score in found.items()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Look up cached ad interests by name (prefix and typo tolerant), offline")
+    parser.add_argument("queries", nargs="*", help="Names to look up; read one per line from stdin when omitted")
+    parser.add_argument("--limit", type=int, default=10, help="Candidates to show per query")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = InterestCatalog(session=None, access_token=None)
+    index = InterestIndex.from_catalog(catalog)
+    print(f"📚 Indexed {len(index.interests)} catalogued interest(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if not index.interests:
+        print("⚠️ The interest catalog is empty; run InterestID.py first to fill it")
+
+    for query in args.queries or (line.strip() for line in sys.stdin):
+        if not query:
+            continue
+        started = time.perf_counter()
+        matches = index.search(query, args.limit)
+        print(f"\n🔎 {query!r}: {len(matches)} match(es) in {(time.perf_counter() - started) * 1000:.2f} ms")
+        for rank, interest in enumerate(matches, 1):
+            size = interest.get("audience_size_upper_bound")
+            print(f"{rank:2d}. {interest['name']} — ID: {interest['id']}"
+                  f"{f' — audience ≤ {size:,}' if size else ''} (score {interest['score']})")
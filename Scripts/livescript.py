@@ -11,6 +11,9 @@ from facebook_business.adobjects.advideo import AdVideo
 from facebook_business.adobjects.adcreative import AdCreative
 from facebook_business.adobjects.ad import Ad
 
+import medulla_path  # noqa: F401  (makes MedullaPOCFile/throttle.py importable)
+from throttle import default_throttle
+
 # ─── Load .env & init API ─────────────────────────────────────────────
 print("🔄 Initializing Facebook Marketing API...")
 load_dotenv()
@@ -26,6 +29,8 @@ print(f"   Page ID: {page_id}")
 
 # Initialize the Facebook API
 FacebookAdsApi.init(app_id, app_secret, access_token, api_version="v23.0")
+# Calls are paced from Meta's rate-limit headers, so the steps below no longer sleep between each other
+default_throttle.install()
 
 # Ensure ad account ID has 'act_' prefix
 if ad_account_id and not ad_account_id.startswith("act_"):
@@ -64,8 +69,6 @@ except Exception as e:
     print(f"❌ Campaign creation failed: {e}")
     exit(1)
 
-sleep_sec(2)
-
 # ─── Step 2: Create R&F Prediction with Enhanced Targeting ─────────────────────────────────────
 print("\n🔹 Step 2: Creating Reach & Frequency Prediction...")
 start_time = int(time.time()) + 3600  # Start in 1 hour 
@@ -153,8 +156,6 @@ except Exception as e:
     print("💡 This usually means invalid placements or targeting for RESERVED campaigns")
     exit(1)
 
-sleep_sec(2)
-
 # ─── Step 3: Poll for Prediction Status ─────────────────────────────────────
 print("\n🔹 Step 3: Monitoring Prediction Status...")
 prediction_obj = ReachFrequencyPrediction(prediction_id)
@@ -209,8 +210,6 @@ try:
 except Exception as e:
     print(f"⚠️ Error verifying region: {e}")
 
-sleep_sec(2)
-
 # ─── Step 5: Reserve the Prediction ────────────────────────────────────────
 print("\n🔹 Step 5: Reserving Prediction...")
 try:
@@ -227,8 +226,6 @@ except Exception as e:
     print(f"❌ Reservation failed: {e}")
     exit(1)
 
-sleep_sec(2)
-
 # ─── Step 6: Create Ad Set ─────────────────────────────────────────────────
 print("\n🔹 Step 6: Creating Ad Set...")
 adset_params = {
@@ -263,8 +260,6 @@ except Exception as e:
     print(f"❌ Ad Set creation failed: {e}")
     exit(1)
 
-sleep_sec(2)
-
 # ─── Step 7: Upload Video & Create Creative ─────────────────────────────────
 print("\n🔹 Step 7: Uploading Video...")
 VIDEO_FILE_PATH = r"C:\Users\Admin\meta_ads_automation\sampleVideo.mp4"  # Update this path
@@ -292,8 +287,6 @@ except Exception as e:
     print(f"❌ Video upload failed: {e}")
     exit(1)
 
-sleep_sec(2)
-
 def upload_image_and_get_hash(image_path, ad_account_id):
     """Uploads an image to Facebook and returns its image_hash."""
     from facebook_business.adobjects.adimage import AdImage
@@ -334,8 +327,6 @@ except Exception as e:
     print(f"❌ Creative creation failed: {e}")
     exit(1)
 
-sleep_sec(2)
-
 # ─── Step 8: Create Ad ─────────────────────────────────────────────────────
 print("\n🔹 Step 8: Creating Final Ad...")
 try:
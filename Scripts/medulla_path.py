@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The bulk pipeline's shared modules (throttle, ...) live in MedullaPOCFile. Scripts here import
+# this module before them so there is one copy of each; appended so local modules still win.
+MEDULLA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "MedullaPOCFile"))
+if MEDULLA_DIR not in sys.path:
+    sys.path.append(MEDULLA_DIR)
@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "MedullaPOCFile"))
+
+from graph_io import get_by_ids, load_json, save_json
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class FakeApi:
+    """Answers ?ids= lookups, failing the whole request when it includes an unknown ID, like Graph does."""
+
+    def __init__(self, known):
+        self.known = known
+        self.calls = []
+
+    def call(self, method, path, params=None):
+        self.calls.append((path, params.get("ids")))
+        ids = params["ids"].split(",") if not path else list(path)
+        if any(i not in self.known for i in ids):
+            raise RuntimeError(f"unknown object in {ids}")
+        return FakeResponse({i: {"id": i} for i in ids} if not path else {"id": ids[0]})
+
+
+def test_get_by_ids_sends_one_request_per_50_ids():
+    api = FakeApi({str(i) for i in range(120)})
+    records, errors = get_by_ids(range(120), ["id"], api)
+    assert len(records) == 120 and not errors
+    assert [len(ids.split(",")) for _, ids in api.calls] == [50, 50, 20]
+
+
+def test_get_by_ids_falls_back_to_one_by_one_when_a_chunk_fails():
+    api = FakeApi({"1", "3"})
+    records, errors = get_by_ids(["1", "2", "3"], ["id"], api)
+    assert sorted(records) == ["1", "3"]
+    assert list(errors) == ["2"]
+
+
+def test_save_json_round_trips_and_load_json_ignores_a_broken_file(tmp_path):
+    path = str(tmp_path / "cache" / "entries.json")
+    assert load_json(path, {}, "test cache") == {}
+    save_json(path, {"a": 1})
+    assert load_json(path, {}, "test cache") == {"a": 1}
+    with open(path, "w") as f:
+        f.write("{not json")
+    assert load_json(path, {"fallback": True}, "test cache") == {"fallback": True}
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+from interest_index import InterestIndex
+
+INTERESTS = [
+    {"id": "1", "name": "Physical fitness", "audience_size_upper_bound": 500_000_000},
+    {"id": "2", "name": "Fitness and wellness", "audience_size_upper_bound": 900_000_000},
+    {"id": "3", "name": "Personal finance", "audience_size_upper_bound": 300_000_000},
+    {"id": "4", "name": "Finance tips", "audience_size_upper_bound": 1_000_000},
+    {"id": "5", "name": "Association football (Soccer)", "audience_size_upper_bound": 700_000_000},
+    {"id": "6", "name": "Yoga", "audience_size_upper_bound": 200_000_000},
+]
+
+
+def names(results):
+    return [r["name"] for r in results]
+
+
+def test_typo_finds_word_inside_multi_word_name():
+    index = InterestIndex(INTERESTS)
+    assert "Physical fitness" in names(index.search("fitnss"))
+    assert "Personal finance" in names(index.search("finanse"))
+    assert "Association football (Soccer)" in names(index.search("fotball"))
+
+
+def test_prefix_matches_rank_first_then_by_audience():
+    index = InterestIndex(INTERESTS)
+    assert names(index.search("fin", limit=2)) == ["Finance tips", "Personal finance"]
+    assert names(index.search("fitness", limit=2)) == ["Fitness and wellness", "Physical fitness"]
+
+
+def test_unrelated_query_finds_nothing():
+    assert InterestIndex(INTERESTS).search("zzzz") == []
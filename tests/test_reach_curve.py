@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "MedullaPOCFile"))
+
+from reach_curve import CURVE_FIELDS, ReachCurve
+
+# A completed prediction as the ?ids= fetch returns it: frequency_distribution_map is a list of maps
+RECORD = {
+    "id": "6123",
+    "status": 1,
+    "curve_budget_reach": {
+        "budget": [30000, 10000, 20000],
+        "reach": [5000, 2000, 4000],
+        "impression": [15000, 4000, 10000],
+    },
+    "frequency_distribution_map": [
+        {"1": [5000.0, 2000.0, 4000.0]},
+        {"2": [3500.0, 1000.0, 2500.0]},
+    ],
+    "audience_size_lower_bound": 900000,
+    "audience_size_upper_bound": 1100000,
+}
+
+
+def test_curve_fields_exist_on_the_sdk_object():
+    from facebook_business.adobjects.reachfrequencyprediction import ReachFrequencyPrediction
+
+    assert set(CURVE_FIELDS) <= set(ReachFrequencyPrediction._field_types)
+
+
+def test_from_record_merges_the_list_of_frequency_maps():
+    curve = ReachCurve.from_record(RECORD)
+    assert curve.reach_at(20000) == 4000
+    assert curve.reach_at(15000) == 3000
+    distribution = curve.reach_distribution_at(np.array([10000, 30000]))
+    assert sorted(distribution) == [1, 2]
+    assert distribution[2].tolist() == [1000.0, 3500.0]
+    assert (curve.audience_size_lower_bound, curve.audience_size_upper_bound) == (900000, 1100000)
+
+
+def test_to_dict_round_trips():
+    curve = ReachCurve.from_record(RECORD)
+    again = ReachCurve.from_record(curve.to_dict())
+    assert again.frequency_distribution.keys() == curve.frequency_distribution.keys()
+    assert again.budget_for_reach(4000) == curve.budget_for_reach(4000) == 20000
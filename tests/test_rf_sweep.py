@@ -0,0 +1,19 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "MedullaPOCFile"))
+
+from rf_sweep import reach_at_frequency
+
+
+def test_reach_at_frequency_reads_the_sdk_list_of_maps():
+    # frequency_distribution_map_agg as the SDK types it: list<map<unsigned int, list<unsigned int>>>
+    record = {"frequency_distribution_map_agg": [{"1": [9000]}, {"2": [5000]}, {"3": [2000]}]}
+    assert reach_at_frequency(record, 2) == 7000
+    assert reach_at_frequency(record, 4) is None
+
+
+def test_reach_at_frequency_still_reads_a_plain_map():
+    record = {"frequency_distribution_map_agg": {"1": 9000, "2": [5000]}}
+    assert reach_at_frequency(record, 1) == 14000
+    assert reach_at_frequency({}, 1) is None